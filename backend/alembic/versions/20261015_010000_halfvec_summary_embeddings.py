@@ -0,0 +1,62 @@
+"""Store chat_summaries embeddings as halfvec (fp16)
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-15 01:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EMBEDDING_DIMENSIONS = 1536
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 200
+
+# Rows converted per UPDATE while backfilling, keeps each statement short
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _convert_embedding_column(target_type: str, opclass: str) -> None:
+    """Copy embedding into a column of target_type, swap it in and rebuild the index."""
+    op.execute(f'ALTER TABLE chat_summaries ADD COLUMN embedding_new {target_type}')
+
+    # Backfill in committed batches so row locks are held only briefly
+    bind = op.get_bind()
+    with op.get_context().autocommit_block():
+        while True:
+            result = bind.execute(sa.text(
+                f'UPDATE chat_summaries SET embedding_new = embedding::{target_type} '
+                f'WHERE id IN ('
+                f'  SELECT id FROM chat_summaries '
+                f'  WHERE embedding IS NOT NULL AND embedding_new IS NULL '
+                f'  LIMIT {BACKFILL_BATCH_SIZE}'
+                f')'
+            ))
+            if result.rowcount == 0:
+                break
+
+    op.drop_index('idx_chat_summaries_embedding', table_name='chat_summaries')
+    op.drop_column('chat_summaries', 'embedding')
+    op.alter_column('chat_summaries', 'embedding_new', new_column_name='embedding')
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            'CREATE INDEX CONCURRENTLY idx_chat_summaries_embedding ON chat_summaries '
+            f'USING hnsw (embedding {opclass}) '
+            f'WITH (m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION})'
+        )
+
+
+def upgrade() -> None:
+    _convert_embedding_column(f'halfvec({EMBEDDING_DIMENSIONS})', 'halfvec_cosine_ops')
+
+
+def downgrade() -> None:
+    _convert_embedding_column(f'vector({EMBEDDING_DIMENSIONS})', 'vector_cosine_ops')
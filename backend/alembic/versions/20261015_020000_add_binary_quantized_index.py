@@ -0,0 +1,32 @@
+"""Add binary-quantized HNSW index for coarse summary shortlisting
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-15 02:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EMBEDDING_DIMENSIONS = 1536
+
+
+def upgrade() -> None:
+    # Expression index over binary_quantize(embedding) - stays in sync with
+    # every writer (backend and telegram bot) without an extra column.
+    with op.get_context().autocommit_block():
+        op.execute(
+            'CREATE INDEX CONCURRENTLY idx_chat_summaries_embedding_bits ON chat_summaries '
+            f'USING hnsw ((binary_quantize(embedding)::bit({EMBEDDING_DIMENSIONS})) bit_hamming_ops)'
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS idx_chat_summaries_embedding_bits')
@@ -0,0 +1,33 @@
+"""Add GIN jsonb_path_ops indexes on chat_summaries topics and metadata
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-15 03:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            'CREATE INDEX CONCURRENTLY idx_chat_summaries_topics_gin ON chat_summaries '
+            'USING gin (topics jsonb_path_ops)'
+        )
+        op.execute(
+            'CREATE INDEX CONCURRENTLY idx_chat_summaries_metadata_gin ON chat_summaries '
+            'USING gin (metadata jsonb_path_ops)'
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS idx_chat_summaries_metadata_gin')
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS idx_chat_summaries_topics_gin')
@@ -0,0 +1,33 @@
+"""Replace chat_summaries user_id index with (user_id, created_at DESC)
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-15 04:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The composite index serves user_id lookups on its own, so the single
+    # column index is dropped. idx_chat_summaries_created_at stays for the
+    # unfiltered recent-summaries query.
+    with op.get_context().autocommit_block():
+        op.execute(
+            'CREATE INDEX CONCURRENTLY idx_chat_summaries_user_created ON chat_summaries '
+            '(user_id, created_at DESC)'
+        )
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS idx_chat_summaries_user_id')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute('CREATE INDEX CONCURRENTLY idx_chat_summaries_user_id ON chat_summaries (user_id)')
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS idx_chat_summaries_user_created')
@@ -0,0 +1,33 @@
+"""Add GIN jsonb_path_ops indexes on messages and sessions metadata
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-15 05:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            'CREATE INDEX CONCURRENTLY idx_messages_metadata_gin ON messages '
+            'USING gin (metadata jsonb_path_ops)'
+        )
+        op.execute(
+            'CREATE INDEX CONCURRENTLY idx_sessions_metadata_gin ON sessions '
+            'USING gin (metadata jsonb_path_ops)'
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS idx_sessions_metadata_gin')
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS idx_messages_metadata_gin')
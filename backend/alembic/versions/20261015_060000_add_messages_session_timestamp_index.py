@@ -0,0 +1,35 @@
+"""Replace messages session_id/timestamp indexes with a composite index
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-15 06:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # History is always read per session in timestamp order, so the composite
+    # index returns rows pre-sorted and stops at LIMIT. It also covers
+    # session_id lookups (FK cascades), so both single-column indexes go.
+    with op.get_context().autocommit_block():
+        op.execute(
+            'CREATE INDEX CONCURRENTLY idx_messages_session_timestamp ON messages '
+            '(session_id, timestamp)'
+        )
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS idx_messages_session_id')
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS idx_messages_timestamp')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute('CREATE INDEX CONCURRENTLY idx_messages_timestamp ON messages (timestamp)')
+        op.execute('CREATE INDEX CONCURRENTLY idx_messages_session_id ON messages (session_id)')
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS idx_messages_session_timestamp')
@@ -0,0 +1,45 @@
+"""Make messages/chat_summaries JSONB columns NOT NULL with server defaults
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-15 07:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '011'
+down_revision: Union[str, None] = '010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, empty value)
+JSONB_COLUMNS = [
+    ('messages', 'metadata', "'{}'::jsonb"),
+    ('chat_summaries', 'topics', "'[]'::jsonb"),
+    ('chat_summaries', 'metadata', "'{}'::jsonb"),
+]
+
+
+def upgrade() -> None:
+    for table, column, empty in JSONB_COLUMNS:
+        op.execute(f'UPDATE {table} SET {column} = {empty} WHERE {column} IS NULL')
+        op.alter_column(
+            table, column,
+            existing_type=postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+            server_default=sa.text(empty),
+        )
+
+
+def downgrade() -> None:
+    for table, column, _ in JSONB_COLUMNS:
+        op.alter_column(
+            table, column,
+            existing_type=postgresql.JSONB(astext_type=sa.Text()),
+            nullable=True,
+            server_default=None,
+        )
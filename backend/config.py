@@ -1,13 +1,20 @@
 """Configuration settings for Jarvis UI backend."""
 import os
-from pydantic_settings import BaseSettings
-from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from functools import cache, cached_property
 from typing import Optional
 
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
     
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+        frozen=True,
+    )
+    
     # Server settings
     host: str = "0.0.0.0"
     port: int = 20005
@@ -15,6 +22,16 @@ class Settings(BaseSettings):
     # Database settings (required - must be set in .env)
     database_url: str
     
+    # Connection pool sizing (per worker process)
+    db_pool_size: int = 20
+    db_max_overflow: int = 10
+    # Ping connections on checkout (one extra round-trip each); enable when a
+    # proxy or failover can drop connections well inside the recycle window
+    db_pool_pre_ping: bool = False
+    
+    # Schema is owned by Alembic migrations; set false to create tables on startup (dev)
+    alembic_managed: bool = True
+    
     # Memory database (optional - defaults to main database)
     memory_database_url: Optional[str] = None
     
@@ -44,6 +61,12 @@ class Settings(BaseSettings):
     
     # Session settings
     session_ttl_days: int = 30
+
+    # pgvector HNSW search breadth (higher = better recall, slower queries)
+    hnsw_ef_search: int = 80
+
+    # Logging level (DEBUG shows streaming chunks)
+    log_level: str = "INFO"
     
     # CORS settings
     cors_origins: str = "*"
@@ -51,21 +74,22 @@ class Settings(BaseSettings):
     # Streaming settings
     stream_enabled: bool = True
     
+    # Seconds to reuse an identical tool-free LLM reply (0 disables)
+    llm_response_cache_ttl: int = 0
+    
+    # Characters of conversation sent to the LLM; older turns are summarized (0 disables)
+    llm_history_max_chars: int = 0
+    
     # SSL verification (disable if behind corporate proxy with self-signed certs)
     verify_ssl: bool = True
     
-    @property
+    @cached_property
     def effective_memory_db_url(self) -> str:
         """Get the memory database URL, defaulting to main database."""
         return self.memory_database_url or self.database_url
-    
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        extra = "ignore"
 
 
-@lru_cache()
+@cache
 def get_settings() -> Settings:
     """Get cached settings instance."""
     return Settings()
@@ -1,4 +1,5 @@
 """Database connection and session management."""
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from config import get_settings
@@ -12,9 +13,25 @@ class Base(DeclarativeBase):
 # Create async engine
 settings = get_settings()
 engine = create_async_engine(
-    settings.database_url,
+    # SQLAlchemy-level cache of prepared asyncpg statements per connection
+    make_url(settings.database_url).update_query_dict(
+        {"prepared_statement_cache_size": "500"}
+    ),
     echo=False,  # Set to True for SQL debugging
-    pool_pre_ping=True,  # Verify connections before using
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=30,  # Fail fast instead of queueing forever when exhausted
+    pool_recycle=1800,  # Replace connections before server/proxy idle timeouts
+    pool_pre_ping=settings.db_pool_pre_ping,
+    connect_args={
+        "statement_cache_size": 500,
+        # The server-side statement_timeout is the query limit: PostgreSQL
+        # cancels the query and the connection stays usable. command_timeout
+        # sits above it and only fires when the server stops answering
+        # (network stall, hung backend).
+        "command_timeout": 30,
+        "server_settings": {"statement_timeout": "25000"},
+    },
 )
 
 # Create async session factory
@@ -35,8 +52,10 @@ async def get_db() -> AsyncSession:
 
 
 async def init_db():
-    """Initialize database tables."""
+    """Initialize database tables (development only, Alembic owns the schema in production)."""
     async with engine.begin() as conn:
+        # Keep one-off DDL compilation out of the engine's statement cache
+        await conn.execution_options(compiled_cache={})
         await conn.run_sync(Base.metadata.create_all)
 
 
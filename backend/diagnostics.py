@@ -3,13 +3,14 @@ Jarvis UI Diagnostics Script
 Tests different prompt types and measures response times.
 
 Usage:
-    python diagnostics.py [--host HOST] [--port PORT]
+    python diagnostics.py [--host HOST] [--port PORT] [--concurrency N]
 """
 
 import asyncio
 import json
 import time
 import argparse
+import orjson
 import websockets
 from dataclasses import dataclass, field
 from typing import Optional
@@ -86,105 +87,100 @@ class TestResult:
 
 
 async def run_websocket_test(
-    ws_url: str,
-    session_id: str,
+    ws,
+    request_id: str,
     prompt: str,
     test_name: str,
     timeout: float = 120.0
 ) -> TestResult:
-    """Run a single WebSocket test with timing."""
+    """Run a single WebSocket test with timing over an open connection.
     
-    start_time = time.time()
-    first_token_time = None
+    Connection errors are not caught here so the caller's task group can
+    cancel the remaining tests cleanly.
+    """
+    
+    start_ns = time.perf_counter_ns()
+    first_token_ns = None
     tokens = []
     tool_calls = []
     tool_results = []
     full_response = ""
     error = None
     
-    try:
-        async with websockets.connect(ws_url, ping_timeout=None) as ws:
-            # Send the message
-            await ws.send(json.dumps({
-                "type": "message",
-                "content": prompt
-            }))
-            
-            # Listen for responses
-            while True:
-                try:
-                    msg = await asyncio.wait_for(ws.recv(), timeout=timeout)
-                    data = json.loads(msg)
-                    msg_type = data.get("type")
-                    
-                    if msg_type == "stream_token":
-                        if first_token_time is None:
-                            first_token_time = time.time()
-                        tokens.append(data.get("content", ""))
-                    
-                    elif msg_type == "tool_call":
-                        tool_calls.append(data.get("tool", "unknown"))
-                    
-                    elif msg_type == "tool_result":
-                        tool_name = data.get("tool", "unknown")
-                        result = data.get("result", {})
-                        tool_results.append((tool_name, result))
-                    
-                    elif msg_type == "stream_end":
-                        full_response = data.get("content", "") or "".join(tokens)
-                        break
-                    
-                    elif msg_type == "error":
-                        error = data.get("content", "Unknown error")
-                        break
-                    
-                    elif msg_type in ["message", "typing", "stream_start"]:
-                        # These are expected intermediate messages
-                        continue
-                    
-                except asyncio.TimeoutError:
-                    error = f"Timeout after {timeout}s"
-                    break
+    # Send the message
+    await ws.send(json.dumps({
+        "type": "message",
+        "content": prompt,
+        "request_id": request_id,
+    }))
+    
+    # Listen for responses
+    while True:
+        try:
+            msg = await asyncio.wait_for(ws.recv(), timeout=timeout)
+        except asyncio.TimeoutError:
+            error = f"Timeout after {timeout}s"
+            break
+        
+        data = orjson.loads(msg)
+        msg_type = data.get("type")
+        
+        if msg_type in ("stream_chunk", "stream_token"):
+            if first_token_ns is None:
+                first_token_ns = time.perf_counter_ns()
+            tokens.append(data.get("content", ""))
+        
+        elif msg_type == "tool_call":
+            tool_calls.append(data.get("tool", "unknown"))
+        
+        elif msg_type == "tool_result":
+            tool_name = data.get("tool", "unknown")
+            result = data.get("result", {})
+            tool_results.append((tool_name, result))
+        
+        elif msg_type == "stream_end":
+            full_response = data.get("content", "") or "".join(tokens)
+            break
         
-        end_time = time.time()
-        total_time_ms = (end_time - start_time) * 1000
-        ttft_ms = (first_token_time - start_time) * 1000 if first_token_time else None
+        elif msg_type == "error":
+            error = data.get("content", "Unknown error")
+            break
         
-        return TestResult(
-            name=test_name,
-            prompt=prompt,
-            success=error is None,
-            total_time_ms=total_time_ms,
-            time_to_first_token_ms=ttft_ms,
-            token_count=len(tokens),
-            tool_calls=tool_calls,
-            tool_results=tool_results,
-            response=full_response,
-            error=error,
-        )
+        elif msg_type in ["message", "typing", "stream_start"]:
+            # These are expected intermediate messages
+            continue
+    
+    total_time_ms = (time.perf_counter_ns() - start_ns) / 1e6
+    ttft_ms = (first_token_ns - start_ns) / 1e6 if first_token_ns is not None else None
     
-    except Exception as e:
-        end_time = time.time()
-        return TestResult(
-            name=test_name,
-            prompt=prompt,
-            success=False,
-            total_time_ms=(end_time - start_time) * 1000,
-            error=str(e),
-        )
+    return TestResult(
+        name=test_name,
+        prompt=prompt,
+        success=error is None,
+        total_time_ms=total_time_ms,
+        time_to_first_token_ms=ttft_ms,
+        token_count=len(tokens),
+        tool_calls=tool_calls,
+        tool_results=tool_results,
+        response=full_response,
+        error=error,
+    )
 
 
-async def run_diagnostics(host: str, port: int, session_id: str = "diagnostics-test", category_filter: str = None):
+async def run_diagnostics(
+    host: str,
+    port: int,
+    session_id: str = "diagnostics-test",
+    category_filter: str = None,
+    concurrency: int = 4,
+):
     """Run all diagnostic tests."""
     
-    ws_url = f"ws://{host}:{port}/ws/{session_id}"
-    
     print(f"\n{Colors.HEADER}{'='*60}{Colors.ENDC}")
     print(f"{Colors.HEADER}JARVIS UI DIAGNOSTICS{Colors.ENDC}")
     print(f"{Colors.HEADER}{'='*60}{Colors.ENDC}")
     print(f"Host: {host}:{port}")
-    print(f"WebSocket URL: {ws_url}")
-    print(f"Session ID: {session_id}")
+    print(f"Session prefix: {session_id}")
     if category_filter:
         print(f"Category Filter: {category_filter}")
     print(f"Time: {datetime.now().isoformat()}")
@@ -260,40 +256,48 @@ async def run_diagnostics(host: str, port: int, session_id: str = "diagnostics-t
         },
     ]
     
-    results = []
-    categories = {}
+    selected = [
+        test_case for test_case in test_cases
+        if not category_filter or category_filter.lower() in test_case["category"].lower()
+    ]
     
-    for test_case in test_cases:
-        category = test_case["category"]
-        
-        # Skip if category filter is set and doesn't match
-        if category_filter and category_filter.lower() not in category.lower():
-            continue
-        
-        if category not in categories:
-            categories[category] = []
-            print(f"\n{Colors.YELLOW}--- {category} ---{Colors.ENDC}")
-        
-        print(f"\nRunning: {test_case['name']}...", end="", flush=True)
-        
-        result = await run_websocket_test(
-            ws_url=ws_url,
-            session_id=f"{session_id}-{len(results)}",
-            prompt=test_case["prompt"],
-            test_name=test_case["name"],
-        )
-        
-        results.append(result)
-        categories[category].append(result)
-        
-        # Quick status
-        if result.success:
-            print(f" {Colors.GREEN}OK{Colors.ENDC} ({result.total_time_ms:.0f}ms)")
-        else:
-            print(f" {Colors.RED}FAIL{Colors.ENDC}")
-        
-        # Small delay between tests
-        await asyncio.sleep(0.5)
+    print(f"Concurrency: {concurrency}")
+    print(f"\n{Colors.YELLOW}--- Running {len(selected)} tests ---{Colors.ENDC}")
+    
+    # Each test runs in a session of its own, so replies never depend on
+    # earlier tests' history. Timing starts once the connection is open, so
+    # the handshake is not part of any sample.
+    pending = asyncio.Queue()
+    for index, test_case in enumerate(selected):
+        pending.put_nowait((index, test_case))
+    results: list[Optional[TestResult]] = [None] * len(selected)
+    
+    async def run_worker() -> None:
+        while not pending.empty():
+            index, test_case = pending.get_nowait()
+            url = f"ws://{host}:{port}/ws/{session_id}-{index}"
+            async with websockets.connect(url, ping_timeout=None) as ws:
+                result = await run_websocket_test(
+                    ws,
+                    request_id=f"{session_id}-{index}",
+                    prompt=test_case["prompt"],
+                    test_name=test_case["name"],
+                )
+            results[index] = result
+            
+            # Quick status
+            if result.success:
+                print(f"{test_case['name']}: {Colors.GREEN}OK{Colors.ENDC} ({result.total_time_ms:.0f}ms)")
+            else:
+                print(f"{test_case['name']}: {Colors.RED}FAIL{Colors.ENDC}")
+    
+    async with asyncio.TaskGroup() as tg:
+        for _ in range(min(concurrency, len(selected))):
+            tg.create_task(run_worker())
+    
+    categories = {}
+    for test_case, result in zip(selected, results):
+        categories.setdefault(test_case["category"], []).append(result)
     
     # Print detailed results
     print(f"\n{Colors.HEADER}{'='*60}{Colors.ENDC}")
@@ -399,12 +403,13 @@ async def main():
     parser = argparse.ArgumentParser(description="Jarvis UI Diagnostics")
     parser.add_argument("--host", default="localhost", help="Backend host")
     parser.add_argument("--port", type=int, default=20005, help="Backend port")
-    parser.add_argument("--session", default=f"diag-{int(time.time())}", help="Session ID")
+    parser.add_argument("--session", default=f"diag-{int(time.time())}", help="Session ID prefix, one session per test")
     parser.add_argument("--category", "-c", help="Filter by category (e.g., 'Simple Q&A', 'Built-in Tools', 'N8N Tools')")
+    parser.add_argument("--concurrency", type=int, default=4, help="Number of tests to run in parallel")
     
     args = parser.parse_args()
     
-    await run_diagnostics(args.host, args.port, args.session, args.category)
+    await run_diagnostics(args.host, args.port, args.session, args.category, args.concurrency)
 
 
 if __name__ == "__main__":
@@ -1,5 +1,9 @@
 """FastAPI application entry point for Jarvis UI backend."""
 import logging
+import logging.config
+import logging.handlers
+import queue
+import sys
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,16 +14,57 @@ import os
 from config import get_settings
 from database.db import init_db, close_db
 from routers import api, websocket
+from services.chat_events import chat_event_bus
+from services.embeddings import embedding_service
+from services.n8n_client import n8n_client
+
+settings = get_settings()
 
 # Configure logging
-# Set to DEBUG to see streaming chunks in console
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+# Records are queued on the event loop thread and written to stderr by a
+# background listener, so log calls never block on the write syscall.
+# Set LOG_LEVEL=DEBUG to see streaming chunks in console.
+log_queue = queue.SimpleQueue()
+logging.config.dictConfig({
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "queue": {
+            "()": lambda: logging.handlers.QueueHandler(log_queue),
+        },
+    },
+    "root": {
+        "level": settings.log_level.upper(),
+        "handlers": ["queue"],
+    },
+})
+stderr_handler = logging.StreamHandler(sys.stderr)
+stderr_handler.setFormatter(
+    logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 )
+log_listener = logging.handlers.QueueListener(log_queue, stderr_handler)
+log_listener.start()
 logger = logging.getLogger(__name__)
 
-settings = get_settings()
+# Frontend build output (served by the backend when present)
+frontend_dist = os.path.join(os.path.dirname(__file__), "..", "frontend", "dist")
+frontend_index = os.path.join(frontend_dist, "index.html")
+
+
+def scan_static_files(root: str) -> dict[str, str]:
+    """Map URL paths (relative to root) to absolute file paths under root."""
+    files = {}
+    pending = [("", root)]
+    while pending:
+        prefix, directory = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                url_path = prefix + entry.name
+                if entry.is_dir():
+                    pending.append((url_path + "/", entry.path))
+                elif entry.is_file():
+                    files[url_path] = os.path.abspath(entry.path)
+    return files
 
 
 @asynccontextmanager
@@ -27,17 +72,39 @@ async def lifespan(app: FastAPI):
     """Application lifespan events."""
     # Startup
     logger.info("Starting Jarvis UI backend...")
+    if settings.alembic_managed:
+        logger.info("Schema managed by Alembic migrations, skipping create_all")
+    else:
+        try:
+            await init_db()
+            logger.info("Database initialized")
+        except Exception as e:
+            logger.warning(f"Database initialization skipped (run migrations first): {e}")
+    
+    # Fan out session events across workers; falls back to local delivery
+    try:
+        await chat_event_bus.start(websocket.manager.deliver)
+    except Exception as e:
+        logger.warning(f"Chat event listener unavailable, delivering locally only: {e}")
+    
+    # Connect to the embeddings API now rather than on the first search
     try:
-        await init_db()
-        logger.info("Database initialized")
+        await embedding_service.start()
     except Exception as e:
-        logger.warning(f"Database initialization skipped (run migrations first): {e}")
+        logger.warning(f"Embedding client warmup failed: {e}")
+    
+    # Index the frontend build once so SPA requests skip filesystem checks
+    app.state.static_files = scan_static_files(frontend_dist) if os.path.exists(frontend_dist) else {}
     
     yield
     
     # Shutdown
     logger.info("Shutting down Jarvis UI backend...")
+    await chat_event_bus.stop()
+    await embedding_service.close()
+    await n8n_client.aclose()
     await close_db()
+    log_listener.stop()
 
 
 # Create FastAPI app
@@ -63,22 +130,19 @@ app.include_router(api.router)
 app.include_router(websocket.router)
 
 # Serve static files from frontend build (if exists)
-frontend_dist = os.path.join(os.path.dirname(__file__), "..", "frontend", "dist")
 if os.path.exists(frontend_dist):
     app.mount("/assets", StaticFiles(directory=os.path.join(frontend_dist, "assets")), name="assets")
     
     @app.get("/")
     async def serve_frontend():
         """Serve the frontend application."""
-        return FileResponse(os.path.join(frontend_dist, "index.html"))
+        return FileResponse(frontend_index)
     
     @app.get("/{path:path}")
     async def serve_frontend_routes(path: str):
         """Serve frontend for all other routes (SPA support)."""
-        file_path = os.path.join(frontend_dist, path)
-        if os.path.exists(file_path) and os.path.isfile(file_path):
-            return FileResponse(file_path)
-        return FileResponse(os.path.join(frontend_dist, "index.html"))
+        file_path = app.state.static_files.get(path)
+        return FileResponse(file_path or frontend_index)
 else:
     @app.get("/")
     async def root():
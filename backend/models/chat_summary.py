@@ -1,9 +1,15 @@
-"""Chat summary database model for storing session summaries."""
+"""Chat summary database model for storing session summaries.
+
+The topics and metadata JSONB columns carry GIN jsonb_path_ops indexes, which
+only accelerate top-level containment. Filter with @> (e.g.
+ChatSummary.topics.contains(["docker"]) or metadata @> '{"source": "web"}'),
+not with ?, ->> or ->; those fall back to a sequential scan.
+"""
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import HALFVEC
 from database.db import Base
 
 # Embedding dimensions for text-embedding-3-small
@@ -22,6 +28,17 @@ class ChatSummary(Base):
     """
     
     __tablename__ = "chat_summaries"
+    __table_args__ = (
+        Index("idx_chat_summaries_user_created", "user_id", text("created_at DESC")),
+        Index(
+            "idx_chat_summaries_topics_gin", "topics",
+            postgresql_using="gin", postgresql_ops={"topics": "jsonb_path_ops"},
+        ),
+        Index(
+            "idx_chat_summaries_metadata_gin", "metadata",
+            postgresql_using="gin", postgresql_ops={"metadata": "jsonb_path_ops"},
+        ),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     session_id = Column(
@@ -32,8 +49,10 @@ class ChatSummary(Base):
     )
     user_id = Column(String(255), nullable=True)  # For future multi-user support
     summary = Column(Text, nullable=False)  # LLM-generated summary of the conversation
-    topics = Column(JSONB, default=list)  # List of main topics discussed
-    embedding = Column(Vector(EMBEDDING_DIMENSIONS), nullable=True)  # For semantic search
+    topics = Column(
+        JSONB, default=list, nullable=False, server_default=text("'[]'::jsonb"),
+    )  # List of main topics discussed
+    embedding = Column(HALFVEC(EMBEDDING_DIMENSIONS), nullable=True)  # fp16, for semantic search
     message_count = Column(Integer, nullable=False)  # Number of messages in original session
     session_created_at = Column(
         DateTime(timezone=True),
@@ -51,7 +70,9 @@ class ChatSummary(Base):
     )
     last_accessed_at = Column(DateTime(timezone=True), nullable=True)
     source = Column(String(50), nullable=True)  # "telegram" or "web"
-    metadata_ = Column("metadata", JSONB, default=dict)  # Additional context
+    metadata_ = Column(
+        "metadata", JSONB, default=dict, nullable=False, server_default=text("'{}'::jsonb"),
+    )  # Additional context
     
     def __repr__(self):
         return f"<ChatSummary(id={self.id}, session_id={self.session_id})>"
@@ -63,13 +84,13 @@ class ChatSummary(Base):
             "session_id": str(self.session_id),
             "user_id": self.user_id,
             "summary": self.summary,
-            "topics": self.topics or [],
+            "topics": self.topics,
             "message_count": self.message_count,
             "session_created_at": self.session_created_at.isoformat(),
             "session_ended_at": self.session_ended_at.isoformat(),
             "created_at": self.created_at.isoformat(),
             "last_accessed_at": self.last_accessed_at.isoformat() if self.last_accessed_at else None,
             "source": self.source,
-            "metadata": self.metadata_ or {},
+            "metadata": self.metadata_,
         }
 
@@ -2,7 +2,7 @@
 from datetime import datetime, timezone
 from sqlalchemy import Column, Integer, String, Text, DateTime
 from sqlalchemy.dialects.postgresql import JSONB
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import HALFVEC
 from database.db import Base
 
 EMBEDDING_DIMENSIONS = 1536
@@ -22,7 +22,7 @@ class MemoryFact(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     content = Column(Text, nullable=False)
     category = Column(String(100), nullable=True)
-    embedding = Column(Vector(EMBEDDING_DIMENSIONS), nullable=True)
+    embedding = Column(HALFVEC(EMBEDDING_DIMENSIONS), nullable=True)  # fp16, for semantic search
     source = Column(String(50), nullable=False, default="telegram")
     created_by = Column(String(255), nullable=True)
     created_at = Column(
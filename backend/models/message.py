@@ -1,6 +1,11 @@
-"""Message database model."""
+"""Message database model.
+
+The metadata JSONB column carries a GIN jsonb_path_ops index, which only
+accelerates containment. Filter with @> (e.g. metadata @> '{"image": true}'),
+not with ?, ->> or ->; those fall back to a sequential scan.
+"""
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from database.db import Base
@@ -10,13 +15,20 @@ class Message(Base):
     """Message model for storing chat messages."""
     
     __tablename__ = "messages"
+    __table_args__ = (
+        # Serves per-session history in timestamp order (either direction)
+        Index("idx_messages_session_timestamp", "session_id", "timestamp"),
+        Index(
+            "idx_messages_metadata_gin", "metadata",
+            postgresql_using="gin", postgresql_ops={"metadata": "jsonb_path_ops"},
+        ),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     session_id = Column(
         UUID(as_uuid=True),
         ForeignKey("sessions.session_id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
     role = Column(String(20), nullable=False)  # 'user' or 'assistant'
     content = Column(Text, nullable=False)
@@ -24,9 +36,10 @@ class Message(Base):
         DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc),
         nullable=False,
-        index=True,
     )
-    metadata_ = Column("metadata", JSONB, default=dict)  # For images/files in future
+    metadata_ = Column(
+        "metadata", JSONB, default=dict, nullable=False, server_default=text("'{}'::jsonb"),
+    )  # For images/files in future
     
     # Relationship to session
     session = relationship("Session", back_populates="messages")
@@ -42,6 +55,6 @@ class Message(Base):
             "role": self.role,
             "content": self.content,
             "timestamp": self.timestamp.isoformat(),
-            "metadata": self.metadata_ or {},
+            "metadata": self.metadata_,
         }
 
@@ -1,7 +1,12 @@
-"""Session database model."""
+"""Session database model.
+
+Session.metadata_ is indexed with GIN (jsonb_path_ops): query it with @>
+containment, e.g. Session.metadata_.contains({"pinned": True}). Key-existence
+(?) and ->> extraction are not covered by that operator class.
+"""
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, DateTime, Text
+from sqlalchemy import Column, String, DateTime, Text, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from database.db import Base
@@ -11,6 +16,12 @@ class Session(Base):
     """Session model for storing chat sessions."""
     
     __tablename__ = "sessions"
+    __table_args__ = (
+        Index(
+            "idx_sessions_metadata_gin", "metadata",
+            postgresql_using="gin", postgresql_ops={"metadata": "jsonb_path_ops"},
+        ),
+    )
     
     session_id = Column(
         UUID(as_uuid=True),
@@ -32,11 +43,14 @@ class Session(Base):
     metadata_ = Column("metadata", JSONB, default=dict)  # For future features
     
     # Relationship to messages
+    # Never lazy-loaded: query sites order and load messages explicitly (or
+    # use selectinload), and deletes rely on the FK's ON DELETE CASCADE
     messages = relationship(
         "Message",
         back_populates="session",
         cascade="all, delete-orphan",
-        order_by="Message.timestamp",
+        passive_deletes=True,
+        lazy="raise_on_sql",
     )
     
     def __repr__(self):
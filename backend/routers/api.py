@@ -1,17 +1,31 @@
 """REST API endpoints."""
+import logging
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, AsyncIterator, List, Optional
+import msgspec
 from database.db import get_db, async_session_maker
 from services.session_manager import session_manager
 from services.session_cleanup import session_cleanup_service
 from config import get_settings
 
 router = APIRouter(prefix="/api", tags=["api"])
+settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
-class MessageResponse(BaseModel):
+class MsgspecJSONResponse(JSONResponse):
+    """JSON response encoded with msgspec, for list-heavy read endpoints."""
+    
+    def render(self, content: Any) -> bytes:
+        return msgspec.json.encode(content)
+
+
+# Read-only payloads built from trusted ORM rows are msgspec Structs, which
+# skip validation entirely; request bodies stay Pydantic.
+class MessageResponse(msgspec.Struct, gc=False, frozen=True):
     """Message response model."""
     id: int
     session_id: str
@@ -21,8 +35,8 @@ class MessageResponse(BaseModel):
     metadata: dict = {}
 
 
-class HistoryResponse(BaseModel):
-    """Chat history response model."""
+class HistoryResponse(msgspec.Struct, gc=False, frozen=True):
+    """Chat history response model (streamed by /history, see stream_history_json)."""
     session_id: str
     messages: List[MessageResponse]
 
@@ -33,7 +47,7 @@ class SessionCheckResponse(BaseModel):
     session_id: str
 
 
-class ChatSummaryResponse(BaseModel):
+class ChatSummaryResponse(msgspec.Struct, gc=False, frozen=True):
     """Chat summary response model."""
     id: int
     session_id: str
@@ -45,6 +59,27 @@ class ChatSummaryResponse(BaseModel):
     created_at: str
 
 
+def json_response_doc(tp: Any) -> dict:
+    """
+    OpenAPI `responses` entry for a route that returns msgspec-encoded JSON.
+    
+    FastAPI only documents Pydantic response models, so the schema comes
+    from msgspec with its definitions inlined in place of $refs.
+    """
+    (schema,), definitions = msgspec.json.schema_components((tp,), ref_template="{name}")
+    
+    def inline(node):
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return inline(definitions[node["$ref"]])
+            return {key: inline(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [inline(value) for value in node]
+        return node
+    
+    return {200: {"content": {"application/json": {"schema": inline(schema)}}}}
+
+
 class CleanupRequest(BaseModel):
     """Request to cleanup old sessions."""
     new_session_id: str
@@ -63,7 +98,6 @@ class CleanupResponse(BaseModel):
 @router.get("/health")
 async def health_check():
     """Health check endpoint."""
-    settings = get_settings()
     return {
         "status": "healthy",
         "llm_provider": settings.llm_provider,
@@ -71,38 +105,60 @@ async def health_check():
     }
 
 
-@router.get("/history/{session_id}", response_model=HistoryResponse)
+async def stream_history_json(session_id: str, limit: Optional[int]) -> AsyncIterator[bytes]:
+    """Encode a session's history as JSON one batch of rows at a time."""
+    yield b'{"session_id":' + msgspec.json.encode(session_id) + b',"messages":['
+    
+    # The request's get_db session is closed before a streaming body is sent,
+    # so the cursor needs a session of its own
+    try:
+        async with async_session_maker() as db:
+            first = True
+            async for rows in session_manager.stream_messages(db, session_id, limit):
+                batch = msgspec.json.encode([
+                    MessageResponse(
+                        id=row.id,
+                        session_id=str(row.session_id),
+                        role=row.role,
+                        content=row.content,
+                        timestamp=row.timestamp,
+                        metadata=row.metadata_,
+                    )
+                    for row in rows
+                ])
+                # Strip the list brackets so batches join into one array
+                yield (b"" if first else b",") + batch[1:-1]
+                first = False
+    except Exception as e:
+        # The 200 status is already sent; end the body without its closing
+        # brackets so clients see invalid JSON rather than a short history
+        logger.error(f"History stream for session {session_id} failed: {e}")
+        return
+    
+    yield b"]}"
+
+
+@router.get("/history/{session_id}", responses=json_response_doc(HistoryResponse))
 async def get_chat_history(
     session_id: str,
     limit: Optional[int] = None,
-    db: AsyncSession = Depends(get_db),
 ):
     """
     Get chat history for a session.
     
+    Messages are streamed from a server-side cursor, so long sessions are
+    never fully materialized in memory.
+    
     Args:
         session_id: The session UUID
         limit: Optional limit on number of messages
-        db: Database session
         
     Returns:
-        Chat history with messages
+        Chat history as {"session_id": ..., "messages": [...]}
     """
-    messages = await session_manager.get_messages(db, session_id, limit)
-    
-    return HistoryResponse(
-        session_id=session_id,
-        messages=[
-            MessageResponse(
-                id=msg.id,
-                session_id=str(msg.session_id),
-                role=msg.role,
-                content=msg.content,
-                timestamp=msg.timestamp.isoformat(),
-                metadata=msg.metadata_ or {},
-            )
-            for msg in messages
-        ],
+    return StreamingResponse(
+        stream_history_json(session_id, limit),
+        media_type="application/json",
     )
 
 
@@ -220,7 +276,11 @@ async def cleanup_sessions(
     )
 
 
-@router.get("/summaries", response_model=List[ChatSummaryResponse])
+@router.get(
+    "/summaries",
+    response_class=MsgspecJSONResponse,
+    responses=json_response_doc(List[ChatSummaryResponse]),
+)
 async def get_summaries(
     limit: int = 10,
     db: AsyncSession = Depends(get_db),
@@ -239,22 +299,22 @@ async def get_summaries(
     """
     summaries = await session_cleanup_service.get_recent_summaries(db, limit=limit)
     
-    return [
+    return MsgspecJSONResponse([
         ChatSummaryResponse(
             id=s.id,
             session_id=str(s.session_id),
             summary=s.summary,
-            topics=s.topics or [],
+            topics=s.topics,
             message_count=s.message_count,
             session_created_at=s.session_created_at.isoformat(),
             session_ended_at=s.session_ended_at.isoformat(),
             created_at=s.created_at.isoformat(),
         )
         for s in summaries
-    ]
+    ])
 
 
-@router.get("/summaries/context", response_model=str)
+@router.get("/summaries/context", response_class=MsgspecJSONResponse)
 async def get_summaries_context(
     limit: int = 5,
     db: AsyncSession = Depends(get_db),
@@ -272,20 +332,16 @@ async def get_summaries_context(
     Returns:
         Formatted context string
     """
-    summaries = await session_cleanup_service.get_recent_summaries(db, limit=limit)
+    summaries = await session_cleanup_service.get_recent_summary_context_rows(db, limit=limit)
     
     if not summaries:
-        return ""
-    
-    context_parts = ["## Previous Conversation Summaries\n"]
+        return MsgspecJSONResponse("")
     
-    for s in summaries:
-        topics_str = ", ".join(s.topics) if s.topics else "N/A"
-        context_parts.append(
-            f"### Session from {s.session_created_at.strftime('%Y-%m-%d %H:%M')}\n"
-            f"**Topics:** {topics_str}\n"
-            f"**Summary:** {s.summary}\n"
-        )
+    context = "## Previous Conversation Summaries\n\n" + "\n".join(
+        f"### Session from {s.created_fmt}\n"
+        f"**Topics:** {', '.join(s.topics) if s.topics else 'N/A'}\n"
+        f"**Summary:** {s.summary}\n"
+        for s in summaries
+    )
     
-    return "\n".join(context_parts)
-
+    return MsgspecJSONResponse(context)
@@ -1,72 +1,578 @@
 """WebSocket endpoints for real-time chat with streaming support."""
-import json
+import asyncio
 import logging
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+import msgspec
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import Dict, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, Optional, Union
 from database.db import async_session_maker
 from services.session_manager import session_manager
-from services.orchestrator import get_orchestrator, OrchestratorEvent
+from services.orchestrator import get_orchestrator, Orchestrator, OrchestratorEvent
 from services.llm_provider import ChatMessage
+from services.chat_events import chat_event_bus
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Number of prior messages passed to the orchestrator as context
+HISTORY_LIMIT = 20
+
+# Streamed tokens are coalesced into one stream_chunk frame per interval,
+# or sooner once this many tokens are buffered
+STREAM_FLUSH_INTERVAL = 0.025
+STREAM_FLUSH_MAX_TOKENS = 32
+
+# Tells this worker's connections apart from other workers' in bus events
+WORKER_ID = uuid.uuid4().hex
+
+
+class MessageFrame(msgspec.Struct, tag_field="type", tag="message"):
+    """Client chat message."""
+    content: str = ""
+
+
+class HistoryFrame(msgspec.Struct, tag_field="type", tag="get_history"):
+    """Client request for the session history."""
+
+
+class StopFrame(msgspec.Struct, tag_field="type", tag="stop"):
+    """Client request to stop the current generation."""
+
+
+# Incoming frames decode straight into one of these by their "type" field
+ClientFrame = Union[MessageFrame, HistoryFrame, StopFrame]
+CLIENT_FRAME_TYPES = {"message", "get_history", "stop"}
+client_frame_decoder = msgspec.json.Decoder(ClientFrame)
+
+
+def decode_client_frame(data: Union[bytes, str]) -> ClientFrame:
+    """
+    Decode a client frame by its "type" field.
+    
+    A frame without "type" is a chat message, as older clients send it.
+    
+    Raises:
+        msgspec.ValidationError: Unknown type or invalid fields, with the
+            error text to send back
+        msgspec.DecodeError: The frame is not valid JSON
+    """
+    try:
+        return client_frame_decoder.decode(data)
+    except msgspec.ValidationError as e:
+        # Only frames that fail the typed decode are read a second time
+        raw = msgspec.json.decode(data)
+        if not isinstance(raw, dict):
+            raise msgspec.ValidationError(f"Invalid message: {e}") from None
+        if "type" not in raw:
+            try:
+                return msgspec.convert({**raw, "type": "message"}, MessageFrame)
+            except msgspec.ValidationError as field_error:
+                raise msgspec.ValidationError(f"Invalid message: {field_error}") from None
+        if raw["type"] not in CLIENT_FRAME_TYPES:
+            raise msgspec.ValidationError(f"Unknown message type: {raw['type']}") from None
+        raise msgspec.ValidationError(f"Invalid message: {e}") from None
+
+
+# Outgoing frames. The tag is written as the "type" field and unset optional
+# fields are left out, so the wire format matches the protocol below.
+class ServerFrame(msgspec.Struct, tag_field="type", omit_defaults=True, gc=False):
+    """Base for frames sent to the client."""
+
+
+class MessageOut(ServerFrame, tag="message"):
+    role: str
+    content: str
+    timestamp: datetime
+    id: int
+
+
+class HistoryMessage(msgspec.Struct, gc=False):
+    id: int
+    session_id: str
+    role: str
+    content: str
+    timestamp: str
+    metadata: dict
+
+
+class HistoryOut(ServerFrame, tag="history"):
+    messages: list[HistoryMessage]
+
+
+class ErrorOut(ServerFrame, tag="error"):
+    content: str
+
+
+class InfoOut(ServerFrame, tag="info"):
+    content: str
+
+
+class TypingOut(ServerFrame, tag="typing"):
+    status: bool
+
+
+class StreamStartOut(ServerFrame, tag="stream_start"):
+    pass
+
+
+class StreamChunkOut(ServerFrame, tag="stream_chunk"):
+    content: str
+
+
+class StreamEndOut(ServerFrame, tag="stream_end"):
+    content: str
+    id: Optional[int] = None
+    timestamp: Optional[datetime] = None
+
+
+class ToolCallOut(ServerFrame, tag="tool_call"):
+    tool: str
+    args: Any
+
+
+class ToolResultOut(ServerFrame, tag="tool_result"):
+    tool: str
+    result: Any
+
+
+# Shared by every outgoing frame, structs and event bus dicts alike
+frame_encoder = msgspec.json.Encoder()
+
+# Constant frames, encoded once at import
+INVALID_JSON_FRAME = frame_encoder.encode(ErrorOut(content="Invalid JSON format"))
+EMPTY_MESSAGE_FRAME = frame_encoder.encode(ErrorOut(content="Empty message"))
+TYPING_ON_FRAME = frame_encoder.encode(TypingOut(status=True))
+STREAM_START_FRAME = frame_encoder.encode(StreamStartOut())
+EMPTY_STREAM_END_FRAME = frame_encoder.encode(StreamEndOut(content=""))
+STOP_ACK_FRAME = frame_encoder.encode(InfoOut(content="Stop requested (not yet implemented)"))
+
 
 class ConnectionManager:
     """Manages WebSocket connections."""
     
     def __init__(self):
-        # Map of session_id to list of WebSocket connections
-        self.active_connections: Dict[str, list[WebSocket]] = {}
+        # Map of session_id to its set of WebSocket connections
+        self.active_connections: Dict[str, set[WebSocket]] = {}
+        # Every open connection and its session, so broadcast is a single pass
+        self.all_sockets: Dict[WebSocket, str] = {}
+        # Recent conversation per connected session, kept in step with the
+        # messages this endpoint stores so it never has to be re-read
+        self.history: Dict[str, deque[ChatMessage]] = {}
     
     async def connect(self, websocket: WebSocket, session_id: str):
         """Accept and store a new WebSocket connection."""
         await websocket.accept()
-        if session_id not in self.active_connections:
-            self.active_connections[session_id] = []
-        self.active_connections[session_id].append(websocket)
+        self.active_connections.setdefault(session_id, set()).add(websocket)
+        self.all_sockets[websocket] = session_id
         logger.info(f"Client connected: {session_id}")
     
     def disconnect(self, websocket: WebSocket, session_id: str):
         """Remove a WebSocket connection."""
-        if session_id in self.active_connections:
-            if websocket in self.active_connections[session_id]:
-                self.active_connections[session_id].remove(websocket)
-            if not self.active_connections[session_id]:
+        self.all_sockets.pop(websocket, None)
+        connections = self.active_connections.get(session_id)
+        if connections is not None:
+            connections.discard(websocket)
+            if not connections:
                 del self.active_connections[session_id]
+                self.history.pop(session_id, None)
         logger.info(f"Client disconnected: {session_id}")
     
-    async def send_message(self, message: dict, session_id: str):
-        """Send a message to all connections for a session."""
+    async def get_history(self, session_id: str) -> deque[ChatMessage]:
+        """Get the session's recent history, loading it from the database once."""
+        if session_id not in self.history:
+            async with async_session_maker() as db:
+                messages = await load_conversation_history(db, session_id, limit=HISTORY_LIMIT)
+            self.history.setdefault(session_id, deque(messages, maxlen=HISTORY_LIMIT))
+        return self.history[session_id]
+    
+    async def _fan_out(self, payload: bytes, connections: list[WebSocket]):
+        """Send an encoded frame to connections, dropping any that fail."""
+        results = await asyncio.gather(
+            *(connection.send_bytes(payload) for connection in connections),
+            return_exceptions=True,
+        )
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error sending message: {result}")
+                session_id = self.all_sockets.get(connection)
+                if session_id is not None:
+                    self.disconnect(connection, session_id)
+    
+    @staticmethod
+    def origin(websocket: WebSocket) -> str:
+        """Identify a connection across workers, so its own events can skip it."""
+        return f"{WORKER_ID}:{id(websocket)}"
+    
+    async def send_message(self, message: Any, session_id: str, exclude: Optional[str] = None):
+        """Send a message to all connections for a session, except the exclude origin."""
         if session_id in self.active_connections:
-            for connection in self.active_connections[session_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    logger.error(f"Error sending message: {e}")
+            connections = [
+                connection for connection in self.active_connections[session_id]
+                if exclude is None or self.origin(connection) != exclude
+            ]
+            if connections:
+                # Encode once and share the frame across the session's connections
+                payload = frame_encoder.encode(message)
+                await self._fan_out(payload, connections)
     
-    async def broadcast(self, message: dict):
+    async def broadcast(self, message: Any):
         """Broadcast a message to all connections."""
-        for session_id in self.active_connections:
-            await self.send_message(message, session_id)
+        payload = frame_encoder.encode(message)
+        await self._fan_out(payload, list(self.all_sockets))
+    
+    async def publish(
+        self,
+        message: Any,
+        session_id: Optional[str] = None,
+        exclude: Optional[WebSocket] = None,
+    ):
+        """
+        Send a message to a session's connections (or to all connections when
+        session_id is None) on every backend worker, skipping exclude.
+        
+        Fan-out failures are logged rather than raised, so they never fail
+        the turn of the connection that produced the message.
+        """
+        event = {"session_id": session_id, "message": message}
+        reference = None
+        if exclude is not None:
+            event["origin"] = self.origin(exclude)
+        if isinstance(message, (MessageOut, StreamEndOut)) and message.id is not None:
+            # Long replies outgrow NOTIFY; receivers then load the stored row
+            reference = {k: v for k, v in event.items() if k != "message"}
+            reference["message_id"] = message.id
+        try:
+            await chat_event_bus.publish(event, reference)
+        except Exception as e:
+            logger.error(f"Error publishing chat event: {e}")
+    
+    async def _load_frame(self, session_id: str, message_id: int) -> Optional[dict]:
+        """Rebuild the frame for a stored message named by a reference event."""
+        # Nothing on this worker would use it
+        if session_id not in self.active_connections and session_id not in self.history:
+            return None
+        async with async_session_maker() as db:
+            row = await session_manager.get_message(db, message_id)
+        if row is None:
+            logger.warning(f"Chat event names missing message {message_id}")
+            return None
+        if row.role == "user":
+            frame = MessageOut(role="user", content=row.content, timestamp=row.timestamp, id=row.id)
+        else:
+            frame = StreamEndOut(id=row.id, timestamp=row.timestamp, content=row.content)
+        # Same shape as events decoded off the bus
+        return msgspec.to_builtins(frame)
+    
+    def _remember(self, session_id: str, message: dict):
+        """Add another worker's user echo or finished reply to the cached history."""
+        history = self.history.get(session_id)
+        if history is None:
+            return
+        frame_type = message.get("type")
+        if frame_type == "message" and message.get("role") == "user":
+            history.append(ChatMessage(role="user", content=message["content"]))
+        elif frame_type == "stream_end" and message.get("content"):
+            history.append(ChatMessage(role="assistant", content=message["content"]))
+    
+    async def deliver(self, event: dict):
+        """Deliver a chat event from the event bus to this worker's connections."""
+        session_id = event.get("session_id")
+        if session_id is None:
+            await self.broadcast(event["message"])
+            return
+        
+        message = event.get("message")
+        if message is None:
+            message = await self._load_frame(session_id, event["message_id"])
+            if message is None:
+                return
+        origin = event.get("origin")
+        # This worker's own turns are already in its history; events from
+        # other workers arrive decoded, as plain dicts
+        if origin is not None and not origin.startswith(f"{WORKER_ID}:"):
+            self._remember(session_id, message)
+        await self.send_message(message, session_id, exclude=origin)
 
 
 # Global connection manager
 manager = ConnectionManager()
 
 
-async def load_conversation_history(db, session_id: str, limit: int = 20) -> list[ChatMessage]:
+async def send_frame(websocket: WebSocket, frame: ServerFrame):
+    """
+    Send a frame to a single connection, encoded with msgspec.
+    
+    datetime fields are encoded natively as RFC 3339 strings.
+    """
+    await websocket.send_bytes(frame_encoder.encode(frame))
+
+
+class TokenBatcher:
+    """
+    Coalesces streamed tokens into stream_chunk frames.
+    
+    The first token is sent immediately so time-to-first-token is unchanged;
+    later tokens are buffered and flushed by a timer every
+    STREAM_FLUSH_INTERVAL seconds, or early at STREAM_FLUSH_MAX_TOKENS.
+    """
+    
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.buffer: list[str] = []
+        self.sent_first = False
+        self._timer: Optional[asyncio.Task] = None
+        # Keeps timer and caller flushes in order on the socket
+        self._send_lock = asyncio.Lock()
+    
+    async def add(self, token: str):
+        """Buffer a token, flushing when the batch is due."""
+        self.buffer.append(token)
+        if not self.sent_first or len(self.buffer) >= STREAM_FLUSH_MAX_TOKENS:
+            self.sent_first = True
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+    
+    async def flush(self):
+        """Send any buffered tokens now (call before other frames and at the end)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self._send()
+    
+    async def _flush_later(self):
+        await asyncio.sleep(STREAM_FLUSH_INTERVAL)
+        # Detach first so a concurrent flush() does not cancel this send
+        self._timer = None
+        try:
+            await self._send()
+        except Exception as e:
+            logger.error(f"Error flushing stream chunk: {e}")
+    
+    async def _send(self):
+        async with self._send_lock:
+            if not self.buffer:
+                return
+            content = "".join(self.buffer)
+            self.buffer.clear()
+            await send_frame(self.websocket, StreamChunkOut(content=content))
+
+
+async def load_conversation_history(db, session_id: str, limit: int = HISTORY_LIMIT) -> list[ChatMessage]:
     """Load recent conversation history as ChatMessage objects."""
-    messages = await session_manager.get_messages(db, session_id, limit=limit)
+    messages = await session_manager.get_recent_messages(db, session_id, limit=limit)
+    return [ChatMessage(role=msg.role, content=msg.content) for msg in messages]
+
+
+async def store_user_message(websocket: WebSocket, db, session_id: str, content: str):
+    """
+    Store a user message and echo it back with its id and timestamp.
     
-    history = []
-    for msg in messages:
-        history.append(ChatMessage(
-            role=msg.role,
-            content=msg.content,
-        ))
+    The session's other connections, on any worker, get the echo too.
+    """
+    user_msg = await session_manager.add_message(db, session_id, "user", content)
+    echo = MessageOut(
+        role="user",
+        content=content,
+        timestamp=user_msg.timestamp,
+        id=user_msg.id,
+    )
+    await send_frame(websocket, echo)
+    await manager.publish(echo, session_id, exclude=websocket)
+
+
+@dataclass(slots=True)
+class ChatConnection:
+    """Per-connection state shared by the frame handlers."""
+    websocket: WebSocket
+    db: AsyncSession
+    session_id: str
+    history: deque[ChatMessage]
+    orchestrator: Orchestrator
+
+
+async def confirm_user_message(conn: ChatConnection, user_confirmation: asyncio.Task) -> bool:
+    """
+    Wait for the user message insert started by handle_message.
     
-    return history
+    On failure the session is rolled back and the client gets an error
+    frame in place of the echo.
+    
+    Returns:
+        True if the message was stored and echoed
+    """
+    try:
+        await user_confirmation
+        return True
+    except Exception as e:
+        logger.error(f"Failed to store user message: {e}")
+        await conn.db.rollback()
+        await send_frame(conn.websocket, ErrorOut(content=f"Failed to store message: {e}"))
+        return False
+
+
+async def handle_history(conn: ChatConnection, frame: HistoryFrame):
+    """Send the full session history."""
+    messages = []
+    async for rows in session_manager.stream_messages(conn.db, conn.session_id):
+        messages.extend(
+            HistoryMessage(
+                id=row.id,
+                session_id=str(row.session_id),
+                role=row.role,
+                content=row.content,
+                timestamp=row.timestamp,
+                metadata=row.metadata_,
+            )
+            for row in rows
+        )
+    # End the read transaction so the connection goes back to the pool
+    await conn.db.commit()
+    await send_frame(conn.websocket, HistoryOut(messages=messages))
+
+
+async def handle_message(conn: ChatConnection, frame: MessageFrame):
+    """Store a user message and stream the orchestrator's reply."""
+    content = frame.content.strip()
+    
+    if not content:
+        await conn.websocket.send_bytes(EMPTY_MESSAGE_FRAME)
+        return
+    
+    # Send typing indicator
+    await conn.websocket.send_bytes(TYPING_ON_FRAME)
+    
+    # Store and echo the user message while the orchestrator builds its
+    # memory context; the two are independent round-trips. Nothing between
+    # here and the try below can raise, and the finally always awaits it.
+    user_confirmation = asyncio.create_task(
+        store_user_message(conn.websocket, conn.db, conn.session_id, content)
+    )
+    
+    # Context is the history before this message, as a list of
+    # its own: the orchestrator extends it with this turn
+    conversation_history = list(conn.history)
+    conn.history.append(ChatMessage(role="user", content=content))
+    
+    # Process message through the orchestrator
+    full_response = ""
+    has_error = False
+    batcher = TokenBatcher(conn.websocket)
+    events = conn.orchestrator.process_message(
+        user_message=content,
+        conversation_history=conversation_history,
+    )
+    # Set once the insert has been awaited, before the first reply frame
+    stored: Optional[bool] = None
+    
+    try:
+        async for event in events:
+            # The echo always goes out before any reply frame
+            if stored is None:
+                stored = await confirm_user_message(conn, user_confirmation)
+                if not stored:
+                    break
+            
+            if event.type == "start":
+                # stream_start also clears the typing indicator on the client
+                await conn.websocket.send_bytes(STREAM_START_FRAME)
+            
+            elif event.type == "token":
+                await batcher.add(event.content)
+            
+            elif event.type == "tool_call":
+                await batcher.flush()
+                await send_frame(conn.websocket, ToolCallOut(
+                    tool=event.tool_name,
+                    args=event.tool_args,
+                ))
+            
+            elif event.type == "tool_result":
+                await batcher.flush()
+                # Raw splices the orchestrator's encoding into the frame
+                result = event.tool_result
+                if event.tool_result_json is not None:
+                    result = msgspec.Raw(event.tool_result_json)
+                await send_frame(conn.websocket, ToolResultOut(
+                    tool=event.tool_name,
+                    result=result,
+                ))
+            
+            elif event.type == "end":
+                full_response = event.full_response or ""
+            
+            elif event.type == "error":
+                has_error = True
+                full_response = event.content
+                await batcher.flush()
+                await send_frame(conn.websocket, ErrorOut(content=event.content))
+    
+    except Exception as e:
+        logger.error(f"Orchestrator error: {e}")
+        if stored is None:
+            stored = await confirm_user_message(conn, user_confirmation)
+        has_error = True
+        full_response = f"Error communicating with AI: {str(e)}"
+        await batcher.flush()
+        if stored:
+            await send_frame(conn.websocket, ErrorOut(content=full_response))
+    
+    finally:
+        try:
+            # No reply frame went out (no events, or an early exit such as the
+            # client disconnecting): the insert still has to finish before
+            # conn.db is used again or closed by the endpoint
+            if stored is None:
+                stored = await confirm_user_message(conn, user_confirmation)
+        finally:
+            await events.aclose()
+    
+    if not stored:
+        # The turn is dropped: nothing was stored, so nothing is remembered
+        conn.history.pop()
+        await conn.websocket.send_bytes(EMPTY_STREAM_END_FRAME)
+        return
+    
+    await batcher.flush()
+    
+    # Store assistant message in database
+    if full_response:
+        assistant_msg = await session_manager.add_message(
+            conn.db, conn.session_id, "assistant", full_response
+        )
+        conn.history.append(ChatMessage(role="assistant", content=full_response))
+        
+        # Send stream end with message details; the session's other
+        # connections get the finished reply in the same frame
+        stream_end = StreamEndOut(
+            id=assistant_msg.id,
+            timestamp=assistant_msg.timestamp,
+            content=full_response,
+        )
+        await send_frame(conn.websocket, stream_end)
+        await manager.publish(stream_end, conn.session_id, exclude=conn.websocket)
+    else:
+        # No response received
+        await conn.websocket.send_bytes(EMPTY_STREAM_END_FRAME)
+
+
+async def handle_stop(conn: ChatConnection, frame: StopFrame):
+    """Acknowledge a stop request."""
+    # TODO: Implement generation stopping
+    logger.info(f"Stop requested for session {conn.session_id}")
+    await conn.websocket.send_bytes(STOP_ACK_FRAME)
+
+
+# Frame type -> handler; the decoder only produces these types
+FRAME_HANDLERS = {
+    HistoryFrame: handle_history,
+    MessageFrame: handle_message,
+    StopFrame: handle_stop,
+}
 
 
 @router.websocket("/ws/{session_id}")
@@ -85,178 +591,45 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
         {"type": "history", "messages": [...]}
         {"type": "error", "content": "..."}
         {"type": "typing", "status": true|false}
-        {"type": "stream_start"}
-        {"type": "stream_token", "content": "..."}
-        {"type": "stream_end", "id": ..., "timestamp": "...", "content": "..."}
+        {"type": "stream_start"} - also ends typing
+        {"type": "stream_chunk", "content": "..."} - one or more coalesced tokens
+        {"type": "stream_end", "id": ..., "timestamp": "...", "content": "..."} - also ends typing
         {"type": "tool_call", "tool": "...", "args": {...}}
         {"type": "tool_result", "tool": "...", "result": {...}}
     """
     await manager.connect(websocket, session_id)
     
+    # Resolve once per connection rather than on every inbound message
+    orchestrator = get_orchestrator()
+    
     try:
-        while True:
-            # Receive message from client
-            data = await websocket.receive_text()
-            
-            try:
-                message_data = json.loads(data)
-            except json.JSONDecodeError:
-                await websocket.send_json({
-                    "type": "error",
-                    "content": "Invalid JSON format",
-                })
-                continue
-            
-            msg_type = message_data.get("type", "message")
+        history = await manager.get_history(session_id)
+        
+        # One session for the whole connection. add_message commits per call,
+        # and the session returns its pooled connection on every commit, so
+        # nothing is held while the client is idle.
+        async with async_session_maker() as db:
+            conn = ChatConnection(websocket, db, session_id, history, orchestrator)
             
-            # Create a new database session for this operation
-            async with async_session_maker() as db:
-                if msg_type == "get_history":
-                    # Get chat history
-                    messages = await session_manager.get_messages(db, session_id)
-                    await websocket.send_json({
-                        "type": "history",
-                        "messages": [msg.to_dict() for msg in messages],
-                    })
-                
-                elif msg_type == "message":
-                    content = message_data.get("content", "").strip()
-                    
-                    if not content:
-                        await websocket.send_json({
-                            "type": "error",
-                            "content": "Empty message",
-                        })
-                        continue
-                    
-                    # Store user message
-                    user_msg = await session_manager.add_message(
-                        db, session_id, "user", content
-                    )
-                    
-                    # Send confirmation of user message
-                    await websocket.send_json({
-                        "type": "message",
-                        "role": "user",
-                        "content": content,
-                        "timestamp": user_msg.timestamp.isoformat(),
-                        "id": user_msg.id,
-                    })
-                    
-                    # Send typing indicator
-                    await websocket.send_json({
-                        "type": "typing",
-                        "status": True,
-                    })
-                    
-                    # Load conversation history for context
-                    conversation_history = await load_conversation_history(db, session_id)
-                    # Remove the last message (the one we just added) since orchestrator will add it
-                    if conversation_history:
-                        conversation_history = conversation_history[:-1]
-                    
-                    # Get orchestrator and process message
-                    orchestrator = get_orchestrator()
-                    full_response = ""
-                    stream_started = False
-                    has_error = False
-                    
-                    try:
-                        async for event in orchestrator.process_message(
-                            user_message=content,
-                            conversation_history=conversation_history,
-                        ):
-                            if event.type == "start":
-                                stream_started = True
-                                # Turn off typing indicator, start streaming
-                                await websocket.send_json({
-                                    "type": "typing",
-                                    "status": False,
-                                })
-                                await websocket.send_json({
-                                    "type": "stream_start",
-                                })
-                            
-                            elif event.type == "token":
-                                await websocket.send_json({
-                                    "type": "stream_token",
-                                    "content": event.content,
-                                })
-                            
-                            elif event.type == "tool_call":
-                                await websocket.send_json({
-                                    "type": "tool_call",
-                                    "tool": event.tool_name,
-                                    "args": event.tool_args,
-                                })
-                            
-                            elif event.type == "tool_result":
-                                await websocket.send_json({
-                                    "type": "tool_result",
-                                    "tool": event.tool_name,
-                                    "result": event.tool_result,
-                                })
-                            
-                            elif event.type == "end":
-                                full_response = event.full_response or ""
-                            
-                            elif event.type == "error":
-                                has_error = True
-                                full_response = event.content
-                                await websocket.send_json({
-                                    "type": "error",
-                                    "content": event.content,
-                                })
-                    
-                    except Exception as e:
-                        logger.error(f"Orchestrator error: {e}")
-                        has_error = True
-                        full_response = f"Error communicating with AI: {str(e)}"
-                        await websocket.send_json({
-                            "type": "error",
-                            "content": full_response,
-                        })
-                    
-                    # Turn off typing if we didn't stream
-                    if not stream_started:
-                        await websocket.send_json({
-                            "type": "typing",
-                            "status": False,
-                        })
-                    
-                    # Store assistant message in database
-                    if full_response:
-                        assistant_msg = await session_manager.add_message(
-                            db, session_id, "assistant", full_response
-                        )
-                        
-                        # Send stream end with message details
-                        await websocket.send_json({
-                            "type": "stream_end",
-                            "id": assistant_msg.id,
-                            "timestamp": assistant_msg.timestamp.isoformat(),
-                            "content": full_response,
-                        })
-                    else:
-                        # No response received
-                        await websocket.send_json({
-                            "type": "stream_end",
-                            "content": "",
-                        })
+            while True:
+                # Receive message from client. Binary frames go to the decoder
+                # as-is; text frames (older clients) are accepted too.
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+                data = message.get("bytes") or message.get("text") or b""
                 
-                elif msg_type == "stop":
-                    # TODO: Implement generation stopping
-                    logger.info(f"Stop requested for session {session_id}")
-                    await websocket.send_json({
-                        "type": "info",
-                        "content": "Stop requested (not yet implemented)",
-                    })
+                # ValidationError subclasses DecodeError, so it is caught first
+                try:
+                    frame = decode_client_frame(data)
+                except msgspec.ValidationError as e:
+                    await send_frame(websocket, ErrorOut(content=str(e)))
+                    continue
+                except msgspec.DecodeError:
+                    await websocket.send_bytes(INVALID_JSON_FRAME)
+                    continue
                 
-                else:
-                    await websocket.send_json({
-                        "type": "error",
-                        "content": f"Unknown message type: {msg_type}",
-                    })
+                await FRAME_HANDLERS[type(frame)](conn, frame)
     
     except WebSocketDisconnect:
         manager.disconnect(websocket, session_id)
@@ -0,0 +1,143 @@
+"""Cross-worker chat event fan-out over PostgreSQL LISTEN/NOTIFY."""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+import msgspec
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from config import get_settings
+from database.db import engine
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "chat_events"
+
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+MAX_PAYLOAD_BYTES = 7999
+
+# Backoff between attempts to reopen a lost listener connection, in seconds
+RECONNECT_DELAY_MIN = 1.0
+RECONNECT_DELAY_MAX = 30.0
+
+EventHandler = Callable[[dict], Awaitable[None]]
+
+
+class ChatEventBus:
+    """
+    Publishes chat events to every backend worker.
+
+    Each worker holds one dedicated asyncpg connection listening on the
+    chat_events channel and hands received events to its local handler.
+    Publishing goes through the regular connection pool. Events too large
+    for NOTIFY are sent as their smaller reference event, if the publisher
+    gives one. When the bus is not running (including while a lost
+    listener connection is being reopened) events are delivered to the
+    local handler only.
+    """
+
+    def __init__(self):
+        self._connection = None
+        self._handler: Optional[EventHandler] = None
+        self._tasks: set[asyncio.Task] = set()
+        self._reconnect_task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._connection is not None
+
+    async def start(self, handler: EventHandler):
+        """Open the listener connection and start delivering events to handler."""
+        self._handler = handler
+        await self._connect()
+
+    async def _connect(self):
+        """Open a listener connection and make it the live one."""
+        import asyncpg
+
+        # asyncpg takes a plain postgresql:// DSN, without the SQLAlchemy driver suffix
+        dsn = make_url(get_settings().database_url).set(drivername="postgresql")
+        connection = await asyncpg.connect(dsn.render_as_string(hide_password=False))
+        await connection.add_listener(CHANNEL, self._on_notify)
+        connection.add_termination_listener(self._on_terminate)
+        self._connection = connection
+        logger.info(f"Listening for chat events on '{CHANNEL}'")
+
+    async def stop(self):
+        """Stop listening and close the dedicated connection."""
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        # Cleared first, so closing does not look like a lost connection
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        connection.remove_termination_listener(self._on_terminate)
+        await connection.remove_listener(CHANNEL, self._on_notify)
+        await connection.close()
+
+    async def publish(self, event: dict, reference: Optional[dict] = None):
+        """
+        Send an event to all workers (including this one).
+
+        Args:
+            event: The event to deliver
+            reference: Smaller event sent in its place when event is too
+                large for NOTIFY; handlers resolve it themselves
+        """
+        payload = msgspec.json.encode(event)
+
+        if self.running and len(payload) > MAX_PAYLOAD_BYTES and reference is not None:
+            payload = msgspec.json.encode(reference)
+
+        if not self.running or len(payload) > MAX_PAYLOAD_BYTES:
+            if self.running:
+                logger.warning(f"Chat event of {len(payload)} bytes too large for NOTIFY, delivering locally")
+            if self._handler is not None:
+                await self._handler(event)
+            return
+
+        async with engine.connect() as conn:
+            await conn.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": CHANNEL, "payload": payload.decode()},
+            )
+            await conn.commit()
+
+    def _on_notify(self, connection, pid, channel, payload):
+        """asyncpg listener callback; schedules delivery on the event loop."""
+        try:
+            event = msgspec.json.decode(payload)
+        except msgspec.DecodeError as e:
+            logger.error(f"Invalid chat event payload: {e}")
+            return
+
+        # Keep a reference so the task is not garbage collected mid-flight
+        task = asyncio.create_task(self._handler(event))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _on_terminate(self, connection):
+        """asyncpg termination callback; falls back to local delivery and reconnects."""
+        if connection is not self._connection:
+            return
+        logger.warning("Chat event listener connection lost, delivering locally until it is reopened")
+        self._connection = None
+        self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        """Reopen the listener connection, backing off between failed attempts."""
+        delay = RECONNECT_DELAY_MIN
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self._connect()
+            except Exception as e:
+                logger.warning(f"Chat event listener reconnect failed: {e}")
+                delay = min(delay * 2, RECONNECT_DELAY_MAX)
+            else:
+                self._reconnect_task = None
+                return
+
+
+# Global chat event bus instance
+chat_event_bus = ChatEventBus()
@@ -1,6 +1,10 @@
 """Embedding service for semantic search using OpenAI embeddings."""
+import asyncio
+import hashlib
 import logging
-from typing import Optional, List
+from collections import OrderedDict
+from typing import Optional, List, Sequence
+import numpy as np
 from config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -9,108 +13,248 @@ logger = logging.getLogger(__name__)
 EMBEDDING_MODEL = "text-embedding-3-small"
 EMBEDDING_DIMENSIONS = 1536
 
+# Concurrent single-text requests are coalesced into one batch call: a batch
+# is sent EMBEDDING_BATCH_WINDOW seconds after its first text arrives, or as
+# soon as it reaches EMBEDDING_BATCH_MAX texts
+EMBEDDING_BATCH_WINDOW = 0.05
+EMBEDDING_BATCH_MAX = 64
+
+# Embeddings kept in the in-process LRU cache (~6 KB each as float32)
+EMBEDDING_CACHE_SIZE = 4096
+
+
+class _BatchQueue:
+    """Collects (text, future) pairs and resolves them with one batch call each."""
+    
+    def __init__(self, service: "EmbeddingService"):
+        self._service = service
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+    
+    def submit(self, text: str) -> asyncio.Future:
+        """Queue a text and return a future for its embedding."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        
+        if len(self._pending) >= EMBEDDING_BATCH_MAX:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(EMBEDDING_BATCH_WINDOW, self._flush)
+        return future
+    
+    def _flush(self):
+        """Send everything queued so far as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        
+        # Keep a reference so the task is not garbage collected mid-flight
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, batch: list[tuple[str, asyncio.Future]]):
+        embeddings = await self._service.create_embeddings_batch([text for text, _ in batch])
+        for (_, future), embedding in zip(batch, embeddings):
+            # The caller may have been cancelled while the batch was in flight
+            if not future.done():
+                future.set_result(embedding)
+
 
 class EmbeddingService:
     """Service for generating and searching embeddings."""
     
     def __init__(self):
-        self._client = None
+        # Created by start() when the application starts
+        self.client = None
+        self._queue = _BatchQueue(self)
+        # Content hash -> embedding, least recently used first
+        self._cache: OrderedDict[bytes, np.ndarray] = OrderedDict()
+    
+    async def start(self):
+        """Create the OpenAI client and open its connection ahead of the first request."""
+        import httpx
+        from openai import AsyncOpenAI
+        settings = get_settings()
+        
+        # HTTP/2 multiplexes concurrent batches over one warm connection
+        self.client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            http_client=httpx.AsyncClient(
+                http2=True,
+                verify=settings.verify_ssl,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=100),
+            ),
+        )
+        await self.client.models.retrieve(EMBEDDING_MODEL)
+    
+    async def close(self):
+        """Close the OpenAI client's connections."""
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
     
-    @property
-    def client(self):
-        """Lazy-load OpenAI client."""
-        if self._client is None:
-            from openai import AsyncOpenAI
-            settings = get_settings()
-            self._client = AsyncOpenAI(api_key=settings.openai_api_key)
-        return self._client
+    @staticmethod
+    def _cache_key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode(), digest_size=16).digest()
     
-    async def create_embedding(self, text: str) -> Optional[List[float]]:
+    def _cache_get(self, key: bytes) -> Optional[np.ndarray]:
+        embedding = self._cache.get(key)
+        if embedding is not None:
+            self._cache.move_to_end(key)
+        return embedding
+    
+    def _cache_put(self, key: bytes, embedding: np.ndarray):
+        # Cached arrays are shared between callers, so they must not be mutated
+        embedding.flags.writeable = False
+        self._cache[key] = embedding
+        self._cache.move_to_end(key)
+        if len(self._cache) > EMBEDDING_CACHE_SIZE:
+            self._cache.popitem(last=False)
+    
+    async def create_embedding(self, text: str) -> Optional[np.ndarray]:
         """
         Create an embedding vector for the given text.
         
+        Requests made at about the same time are sent together in a single
+        batch call (see EMBEDDING_BATCH_WINDOW).
+        
         Args:
             text: The text to embed
             
         Returns:
-            List of floats representing the embedding vector, or None on error
+            float32 embedding vector, or None on error
         """
         if not text or not text.strip():
             logger.warning("Empty text provided for embedding")
             return None
         
-        try:
-            response = await self.client.embeddings.create(
-                model=EMBEDDING_MODEL,
-                input=text.strip(),
-            )
-            return response.data[0].embedding
-        except Exception as e:
-            logger.error(f"Failed to create embedding: {e}")
-            return None
+        text = text.strip()
+        # Skip the batching window entirely for text embedded recently
+        cached = self._cache_get(self._cache_key(text))
+        if cached is not None:
+            return cached
+        
+        return await self._queue.submit(text)
     
-    async def create_embeddings_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
+    async def create_embeddings_batch(self, texts: List[str]) -> List[Optional[np.ndarray]]:
         """
         Create embeddings for multiple texts in a single API call.
         
+        Texts already in the cache are not sent.
+        
         Args:
             texts: List of texts to embed
             
         Returns:
-            List of embedding vectors (or None for failed items)
+            List of float32 embedding vectors (or None for failed items)
         """
         if not texts:
             return []
         
-        # Filter out empty texts but keep track of indices
-        valid_texts = []
-        valid_indices = []
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        
+        # Serve repeats from the cache; only misses (with their indices) are sent
+        miss_texts = []
+        miss_keys = []
+        miss_indices = []
         for i, text in enumerate(texts):
             if text and text.strip():
-                valid_texts.append(text.strip())
-                valid_indices.append(i)
+                key = self._cache_key(text.strip())
+                cached = self._cache_get(key)
+                if cached is not None:
+                    results[i] = cached
+                else:
+                    miss_texts.append(text.strip())
+                    miss_keys.append(key)
+                    miss_indices.append(i)
         
-        if not valid_texts:
-            return [None] * len(texts)
+        if not miss_texts:
+            return results
         
         try:
             response = await self.client.embeddings.create(
                 model=EMBEDDING_MODEL,
-                input=valid_texts,
+                input=miss_texts,
             )
-            
-            # Map results back to original indices
-            results = [None] * len(texts)
-            for i, embedding_data in enumerate(response.data):
-                original_idx = valid_indices[i]
-                results[original_idx] = embedding_data.embedding
-            
-            return results
         except Exception as e:
             logger.error(f"Failed to create batch embeddings: {e}")
-            return [None] * len(texts)
+            return results
+        
+        # Map results back to original indices
+        for i, embedding_data in enumerate(response.data):
+            embedding = np.asarray(embedding_data.embedding, dtype=np.float32)
+            self._cache_put(miss_keys[i], embedding)
+            results[miss_indices[i]] = embedding
+        
+        return results
     
-    def cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
+    def cosine_similarity(self, vec1: Sequence[float], vec2: Sequence[float]) -> float:
         """
         Calculate cosine similarity between two vectors.
         
         Args:
-            vec1: First vector
-            vec2: Second vector
+            vec1: First vector (list or ndarray)
+            vec2: Second vector (list or ndarray)
             
         Returns:
             Cosine similarity score (0-1)
         """
-        import math
-        
-        dot_product = sum(a * b for a, b in zip(vec1, vec2))
-        norm1 = math.sqrt(sum(a * a for a in vec1))
-        norm2 = math.sqrt(sum(b * b for b in vec2))
+        v1 = np.asarray(vec1, dtype=np.float32)
+        v2 = np.asarray(vec2, dtype=np.float32)
+        norm1 = np.linalg.norm(v1)
+        norm2 = np.linalg.norm(v2)
         
         if norm1 == 0 or norm2 == 0:
             return 0.0
         
-        return dot_product / (norm1 * norm2)
+        return float(np.dot(v1, v2) / (norm1 * norm2))
+    
+    def cosine_similarity_bulk(self, query: Sequence[float], matrix: np.ndarray) -> np.ndarray:
+        """
+        Calculate cosine similarity between a query and every row of a matrix.
+        
+        The whole comparison is one matrix-vector product, so scoring N
+        embeddings costs a single BLAS call instead of N Python-level ones.
+        
+        Args:
+            query: Query vector
+            matrix: (N, dimensions) array of embeddings, float16 or float32
+            
+        Returns:
+            Array of N cosine similarity scores (0 where either norm is 0)
+        """
+        q = np.asarray(query, dtype=np.float32)
+        # Accumulate in float32 even when rows are stored as float16
+        m = np.asarray(matrix, dtype=np.float32)
+        norms = np.linalg.norm(m, axis=1) * np.linalg.norm(q)
+        
+        scores = m @ q
+        return np.divide(scores, norms, out=np.zeros_like(scores), where=norms != 0)
+    
+    def search(self, matrix: np.ndarray, query: Sequence[float], k: int) -> np.ndarray:
+        """
+        Find the k rows of matrix most similar to query.
+        
+        Args:
+            matrix: (N, dimensions) array of embeddings, float16 or float32
+            query: Query vector
+            k: Number of results
+            
+        Returns:
+            Row indices of the top k matches, best first
+        """
+        scores = self.cosine_similarity_bulk(query, matrix)
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+        
+        # argpartition finds the top k in O(N); only those k are sorted
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
 
 
 # Global instance
@@ -1,14 +1,20 @@
 """LLM Provider abstraction layer with streaming and tool calling support."""
+import asyncio
+import hashlib
 import json
 import logging
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from abc import ABC, abstractmethod
-from typing import Optional, AsyncGenerator, Any
+from typing import Optional, AsyncGenerator, Any, Callable
 from dataclasses import dataclass
+import msgspec
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class StreamEvent:
     """Represents a streaming event from the LLM."""
     type: str  # "start", "token", "tool_call", "tool_result", "end", "error"
@@ -19,7 +25,89 @@ class StreamEvent:
     full_response: Optional[str] = None
 
 
-@dataclass
+# Consecutive token events are merged until this many characters are
+# buffered or this many seconds have passed since the first of them
+TOKEN_BATCH_MAX_CHARS = 256
+TOKEN_BATCH_INTERVAL = 0.02
+
+
+async def batch_tokens(
+    events: AsyncGenerator[StreamEvent, None],
+    max_chars: int = TOKEN_BATCH_MAX_CHARS,
+    max_interval: float = TOKEN_BATCH_INTERVAL,
+) -> AsyncGenerator[StreamEvent, None]:
+    """
+    Coalesce runs of token events from a provider stream.
+    
+    The first token is passed through immediately. After that, tokens are
+    merged into one event until max_chars or max_interval is reached, and
+    any other event (tool_call, end, error) flushes the run first. A run is
+    also flushed when the interval expires while the provider is quiet, so
+    a pause never holds back text already received.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = events.__aiter__()
+    buffer: list[str] = []
+    size = 0
+    deadline: Optional[float] = None
+    passed_first = False
+    pending: Optional[asyncio.Future] = None
+    
+    try:
+        while True:
+            if deadline is None and pending is None:
+                # Nothing buffered, so there is no deadline to race against
+                try:
+                    event = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+            else:
+                if pending is None:
+                    pending = asyncio.ensure_future(iterator.__anext__())
+                timeout = None if deadline is None else max(deadline - loop.time(), 0)
+                done, _ = await asyncio.wait({pending}, timeout=timeout)
+                if not done:
+                    yield StreamEvent(type="token", content="".join(buffer))
+                    buffer.clear()
+                    size = 0
+                    deadline = None
+                    continue
+                try:
+                    event = pending.result()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    pending = None
+            
+            if event.type == "token" and event.content:
+                if not passed_first:
+                    passed_first = True
+                    yield event
+                    continue
+                buffer.append(event.content)
+                size += len(event.content)
+                if deadline is None:
+                    deadline = loop.time() + max_interval
+                if size < max_chars:
+                    continue
+                event = None
+            
+            if buffer:
+                yield StreamEvent(type="token", content="".join(buffer))
+                buffer.clear()
+                size = 0
+                deadline = None
+            if event is not None:
+                yield event
+        
+        if buffer:
+            yield StreamEvent(type="token", content="".join(buffer))
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+@dataclass(slots=True)
 class ToolCall:
     """Represents a tool call request from the LLM."""
     id: str
@@ -27,7 +115,7 @@ class ToolCall:
     arguments: dict
 
 
-@dataclass
+@dataclass(slots=True)
 class ChatMessage:
     """Represents a chat message."""
     role: str  # "system", "user", "assistant", "tool"
@@ -46,10 +134,15 @@ class LLMProvider(ABC):
         messages: list[ChatMessage],
         tools: Optional[list[dict]] = None,
         system_prompt: Optional[str] = None,
+        system_context: Optional[str] = None,
     ) -> tuple[str, Optional[list[ToolCall]]]:
         """
         Send messages to the LLM and get a response.
         
+        system_prompt should be the static, reusable part of the system
+        prompt; per-request context goes in system_context so providers
+        with prompt caching can cache the former.
+        
         Returns:
             Tuple of (response_text, tool_calls)
         """
@@ -61,6 +154,7 @@ class LLMProvider(ABC):
         messages: list[ChatMessage],
         tools: Optional[list[dict]] = None,
         system_prompt: Optional[str] = None,
+        system_context: Optional[str] = None,
     ) -> AsyncGenerator[StreamEvent, None]:
         """
         Stream chat completions with optional tool calling.
@@ -71,6 +165,110 @@ class LLMProvider(ABC):
         raise NotImplementedError
 
 
+@lru_cache(maxsize=32)
+def prompt_cache_key(system_prompt: str) -> str:
+    """Stable key for a static system prompt, used to route provider-side caching."""
+    return "jarvis-" + hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:16]
+
+
+def decode_tool_arguments(fragments: list[str]) -> dict:
+    """
+    Decode streamed tool-call argument fragments into a dict.
+    
+    Fragments are joined once at the end instead of being concatenated per
+    chunk, so long arguments are copied a single time.
+    
+    Args:
+        fragments: Argument JSON fragments in arrival order
+        
+    Returns:
+        The decoded arguments, or {} when empty or not a JSON object
+    """
+    if not fragments:
+        return {}
+    try:
+        args = msgspec.json.decode("".join(fragments))
+    except msgspec.DecodeError:
+        return {}
+    return args if isinstance(args, dict) else {}
+
+
+# Translated tool lists kept per provider. Schemas come from the tool
+# registry, which builds each dict once and never mutates it, so a list is
+# identified by the ids of its schema dicts.
+TOOL_TRANSLATION_CACHE_SIZE = 32
+
+
+def cached_tool_translation(
+    cache: OrderedDict,
+    tools: list[dict],
+    translate: Callable[[list[dict]], Any],
+) -> Any:
+    """
+    Translate OpenAI tool schemas, reusing the result for the same schemas.
+    
+    Args:
+        cache: The provider's translation cache
+        tools: OpenAI-format tool schemas
+        translate: Builds the provider-specific tool list
+        
+    Returns:
+        The translated tools (shared between calls; do not mutate)
+    """
+    key = tuple(map(id, tools))
+    hit = cache.get(key)
+    if hit is not None:
+        cache.move_to_end(key)
+        return hit[1]
+    
+    result = translate(tools)
+    # Holding the schemas keeps their ids from being reused while cached
+    cache[key] = (tuple(tools), result)
+    if len(cache) > TOOL_TRANSLATION_CACHE_SIZE:
+        cache.popitem(last=False)
+    return result
+
+
+# Formatted messages kept per provider. Conversation history carries the
+# same ChatMessage objects from turn to turn, so each one is converted once
+# and found by identity on later requests.
+FORMATTED_MESSAGE_CACHE_SIZE = 256
+
+
+def cached_message_formatting(
+    cache: OrderedDict,
+    messages: list[ChatMessage],
+    format_message: Callable[[ChatMessage], Optional[dict]],
+) -> list[dict]:
+    """
+    Convert messages to a provider format, reusing earlier conversions.
+    
+    Args:
+        cache: The provider's formatted-message cache
+        messages: Messages to convert, in order
+        format_message: Converts one message; None drops it
+        
+    Returns:
+        A new list of formatted messages (the dicts are shared; do not mutate)
+    """
+    formatted = []
+    for msg in messages:
+        key = id(msg)
+        hit = cache.get(key)
+        if hit is not None:
+            cache.move_to_end(key)
+            item = hit[1]
+        else:
+            item = format_message(msg)
+            # Holding the message keeps its id from being reused while cached
+            cache[key] = (msg, item)
+            if len(cache) > FORMATTED_MESSAGE_CACHE_SIZE:
+                cache.popitem(last=False)
+        if item is not None:
+            formatted.append(item)
+    return formatted
+
+
 class OpenAIProvider(LLMProvider):
     """OpenAI/GPT implementation with streaming and tool calling."""
     
@@ -86,57 +284,96 @@ class OpenAIProvider(LLMProvider):
             self.client = AsyncOpenAI(api_key=api_key, http_client=http_client)
         else:
             self.client = AsyncOpenAI(api_key=api_key)
+        self._message_cache: OrderedDict = OrderedDict()
     
-    def _format_messages(
-        self, 
-        messages: list[ChatMessage], 
-        system_prompt: Optional[str] = None
-    ) -> list[dict]:
-        """Convert ChatMessage objects to OpenAI format."""
-        formatted = []
-        
+    # OpenAI caches prompts by exact prefix, so requests are laid out as a
+    # stable prefix (tools, static system prompt, earlier turns) followed by
+    # the parts that change every turn (memory context, newest message).
+    
+    @staticmethod
+    def _stable_tools(tools: Optional[list[dict]]) -> Optional[list[dict]]:
+        """Order tool definitions by name so their serialization never shifts."""
+        if not tools:
+            return None
+        return sorted(tools, key=lambda tool: tool.get("function", {}).get("name", ""))
+    
+    @staticmethod
+    def _static_prefix(system_prompt: Optional[str]) -> list[dict]:
+        """System message for the static prompt."""
         if system_prompt:
-            formatted.append({"role": "system", "content": system_prompt})
-        
-        for msg in messages:
-            if msg.role == "tool":
-                formatted.append({
-                    "role": "tool",
-                    "content": msg.content,
-                    "tool_call_id": msg.tool_call_id,
-                })
-            elif msg.role == "assistant" and msg.tool_calls:
-                formatted.append({
-                    "role": "assistant",
-                    "content": msg.content or "",
-                    "tool_calls": [
-                        {
-                            "id": tc.id,
-                            "type": "function",
-                            "function": {
-                                "name": tc.name,
-                                "arguments": json.dumps(tc.arguments),
-                            }
+            return [{"role": "system", "content": system_prompt}]
+        return []
+    
+    @staticmethod
+    def _format_message(msg: ChatMessage) -> dict:
+        """Convert one ChatMessage to OpenAI format."""
+        if msg.role == "tool":
+            return {
+                "role": "tool",
+                "content": msg.content,
+                "tool_call_id": msg.tool_call_id,
+            }
+        elif msg.role == "assistant" and msg.tool_calls:
+            return {
+                "role": "assistant",
+                "content": msg.content or "",
+                "tool_calls": [
+                    {
+                        "id": tc.id,
+                        "type": "function",
+                        "function": {
+                            "name": tc.name,
+                            # Canonical form, so identical arguments are identical bytes
+                            "arguments": msgspec.json.encode(tc.arguments, order="sorted").decode(),
                         }
-                        for tc in msg.tool_calls
-                    ]
-                })
-            else:
-                formatted.append({
-                    "role": msg.role,
-                    "content": msg.content,
-                })
+                    }
+                    for tc in msg.tool_calls
+                ]
+            }
+        return {
+            "role": msg.role,
+            "content": msg.content,
+        }
+    
+    def _dynamic_tail(
+        self,
+        messages: list[ChatMessage],
+        system_context: Optional[str] = None,
+    ) -> list[dict]:
+        """Convert ChatMessage objects to OpenAI format, with per-request context last."""
+        formatted = cached_message_formatting(self._message_cache, messages, self._format_message)
+        
+        # Memory context changes every turn; placed just before the newest
+        # user message it leaves the earlier conversation in the cached
+        # prefix (and never splits a tool call from its results)
+        if system_context:
+            position = next(
+                (i for i in range(len(formatted) - 1, -1, -1) if formatted[i]["role"] == "user"),
+                len(formatted),
+            )
+            formatted.insert(position, {"role": "system", "content": system_context})
         
         return formatted
     
+    def _format_messages(
+        self,
+        messages: list[ChatMessage],
+        system_prompt: Optional[str] = None,
+        system_context: Optional[str] = None,
+    ) -> list[dict]:
+        """Convert ChatMessage objects to OpenAI format."""
+        return self._static_prefix(system_prompt) + self._dynamic_tail(messages, system_context)
+    
     async def chat(
         self,
         messages: list[ChatMessage],
         tools: Optional[list[dict]] = None,
         system_prompt: Optional[str] = None,
+        system_context: Optional[str] = None,
     ) -> tuple[str, Optional[list[ToolCall]]]:
         """Non-streaming chat completion."""
-        formatted_messages = self._format_messages(messages, system_prompt)
+        formatted_messages = self._format_messages(messages, system_prompt, system_context)
+        tools = self._stable_tools(tools)
         
         kwargs = {
             "model": self.model,
@@ -144,6 +381,8 @@ class OpenAIProvider(LLMProvider):
         }
         if tools:
             kwargs["tools"] = tools
+        if system_prompt:
+            kwargs["extra_body"] = {"prompt_cache_key": prompt_cache_key(system_prompt)}
         
         response = await self.client.chat.completions.create(**kwargs)
         choice = response.choices[0]
@@ -154,7 +393,7 @@ class OpenAIProvider(LLMProvider):
                 ToolCall(
                     id=tc.id,
                     name=tc.function.name,
-                    arguments=json.loads(tc.function.arguments),
+                    arguments=msgspec.json.decode(tc.function.arguments),
                 )
                 for tc in choice.message.tool_calls
             ]
@@ -166,9 +405,11 @@ class OpenAIProvider(LLMProvider):
         messages: list[ChatMessage],
         tools: Optional[list[dict]] = None,
         system_prompt: Optional[str] = None,
+        system_context: Optional[str] = None,
     ) -> AsyncGenerator[StreamEvent, None]:
         """Stream chat completions with tool calling support."""
-        formatted_messages = self._format_messages(messages, system_prompt)
+        formatted_messages = self._format_messages(messages, system_prompt, system_context)
+        tools = self._stable_tools(tools)
         
         kwargs = {
             "model": self.model,
@@ -177,65 +418,86 @@ class OpenAIProvider(LLMProvider):
         }
         if tools:
             kwargs["tools"] = tools
+        if system_prompt:
+            # Routes requests sharing this prompt prefix to the same cache
+            kwargs["extra_body"] = {"prompt_cache_key": prompt_cache_key(system_prompt)}
         
         try:
             yield StreamEvent(type="start")
             
-            full_content = ""
-            tool_calls_accumulator: dict[int, dict] = {}
+            content_parts: list[str] = []
             
             response = await self.client.chat.completions.create(**kwargs)
             
-            async for chunk in response:
-                delta = chunk.choices[0].delta if chunk.choices else None
-                
-                if delta is None:
-                    continue
-                
-                # Handle text content
-                if delta.content:
-                    full_content += delta.content
-                    yield StreamEvent(type="token", content=delta.content)
+            if not tools:
+                # No tools were offered, so chunks only carry text
+                async for chunk in response:
+                    choices = chunk.choices
+                    if not choices:
+                        continue
+                    delta = choices[0].delta
+                    if delta is None:
+                        continue
+                    content = delta.content
+                    if content:
+                        content_parts.append(content)
+                        yield StreamEvent(type="token", content=content)
+            else:
+                tool_calls_accumulator: dict[int, dict] = {}
                 
-                # Handle tool calls
-                if delta.tool_calls:
-                    for tc in delta.tool_calls:
-                        idx = tc.index
-                        if idx not in tool_calls_accumulator:
-                            tool_calls_accumulator[idx] = {
+                async for chunk in response:
+                    # Each attribute is read once; most chunks are a single text delta
+                    choices = chunk.choices
+                    if not choices:
+                        continue
+                    delta = choices[0].delta
+                    if delta is None:
+                        continue
+                    
+                    # Handle text content
+                    content = delta.content
+                    if content:
+                        content_parts.append(content)
+                        yield StreamEvent(type="token", content=content)
+                    
+                    # Handle tool calls
+                    delta_tool_calls = delta.tool_calls
+                    if not delta_tool_calls:
+                        continue
+                    
+                    for tc in delta_tool_calls:
+                        entry = tool_calls_accumulator.get(tc.index)
+                        if entry is None:
+                            entry = tool_calls_accumulator[tc.index] = {
                                 "id": "",
                                 "name": "",
-                                "arguments": "",
+                                "arguments": [],
                             }
                         
                         if tc.id:
-                            tool_calls_accumulator[idx]["id"] = tc.id
-                        if tc.function:
-                            if tc.function.name:
-                                tool_calls_accumulator[idx]["name"] = tc.function.name
-                            if tc.function.arguments:
-                                tool_calls_accumulator[idx]["arguments"] += tc.function.arguments
-            
-            # Emit tool calls if any
-            if tool_calls_accumulator:
-                for idx in sorted(tool_calls_accumulator.keys()):
-                    tc = tool_calls_accumulator[idx]
-                    try:
-                        args = json.loads(tc["arguments"]) if tc["arguments"] else {}
-                    except json.JSONDecodeError:
-                        args = {}
-                    
-                    yield StreamEvent(
-                        type="tool_call",
-                        tool_name=tc["name"],
-                        tool_call_id=tc["id"],
-                        tool_args=args,
-                    )
+                            entry["id"] = tc.id
+                        function = tc.function
+                        if function:
+                            if function.name:
+                                entry["name"] = function.name
+                            if function.arguments:
+                                entry["arguments"].append(function.arguments)
+                
+                # Emit tool calls if any
+                if tool_calls_accumulator:
+                    for idx in sorted(tool_calls_accumulator.keys()):
+                        tc = tool_calls_accumulator[idx]
+                        yield StreamEvent(
+                            type="tool_call",
+                            tool_name=tc["name"],
+                            tool_call_id=tc["id"],
+                            tool_args=decode_tool_arguments(tc["arguments"]),
+                        )
             
-            yield StreamEvent(type="end", full_response=full_content)
+            yield StreamEvent(type="end", full_response="".join(content_parts))
         
         except Exception as e:
-            logger.error(f"OpenAI streaming error: {e}")
+            logger.exception("OpenAI streaming error: %s", e)
             yield StreamEvent(type="error", content=str(e))
 
 
@@ -246,55 +508,91 @@ class AnthropicProvider(LLMProvider):
         from anthropic import AsyncAnthropic
         self.model = model
         self.client = AsyncAnthropic(api_key=api_key)
+        self._tool_cache: OrderedDict = OrderedDict()
+        self._message_cache: OrderedDict = OrderedDict()
+    
+    def _format_system(
+        self,
+        system_prompt: Optional[str],
+        system_context: Optional[str],
+    ) -> Optional[list[dict]]:
+        """Build system blocks, marking the static prompt as a cache breakpoint."""
+        blocks = []
+        if system_prompt:
+            blocks.append({
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"},
+            })
+        if system_context:
+            blocks.append({"type": "text", "text": system_context})
+        return blocks or None
+    
+    @staticmethod
+    def _format_message(msg: ChatMessage) -> Optional[dict]:
+        """Convert one ChatMessage to Anthropic format."""
+        if msg.role == "system":
+            # Anthropic handles system separately
+            return None
+        elif msg.role == "tool":
+            return {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "tool_result",
+                        "tool_use_id": msg.tool_call_id,
+                        "content": msg.content,
+                    }
+                ]
+            }
+        elif msg.role == "assistant" and msg.tool_calls:
+            content = []
+            if msg.content:
+                content.append({"type": "text", "text": msg.content})
+            for tc in msg.tool_calls:
+                content.append({
+                    "type": "tool_use",
+                    "id": tc.id,
+                    "name": tc.name,
+                    "input": tc.arguments,
+                })
+            return {"role": "assistant", "content": content}
+        return {
+            "role": msg.role,
+            "content": msg.content,
+        }
     
     def _format_messages(
         self, 
         messages: list[ChatMessage], 
-        system_prompt: Optional[str] = None
-    ) -> tuple[Optional[str], list[dict]]:
+        system_prompt: Optional[str] = None,
+        system_context: Optional[str] = None,
+    ) -> tuple[Optional[list[dict]], list[dict]]:
         """Convert ChatMessage objects to Anthropic format."""
-        formatted = []
+        formatted = cached_message_formatting(self._message_cache, messages, self._format_message)
         
-        for msg in messages:
-            if msg.role == "system":
-                # Anthropic handles system separately
-                continue
-            elif msg.role == "tool":
-                formatted.append({
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "tool_result",
-                            "tool_use_id": msg.tool_call_id,
-                            "content": msg.content,
-                        }
-                    ]
-                })
-            elif msg.role == "assistant" and msg.tool_calls:
-                content = []
-                if msg.content:
-                    content.append({"type": "text", "text": msg.content})
-                for tc in msg.tool_calls:
-                    content.append({
-                        "type": "tool_use",
-                        "id": tc.id,
-                        "name": tc.name,
-                        "input": tc.arguments,
-                    })
-                formatted.append({"role": "assistant", "content": content})
-            else:
-                formatted.append({
-                    "role": msg.role,
-                    "content": msg.content,
-                })
+        # Cache breakpoint on the newest turn, so the next request (which
+        # repeats this conversation) reads the whole history from cache.
+        # The cached dicts are shared, so the marked turn is a copy.
+        if formatted:
+            content = formatted[-1]["content"]
+            if isinstance(content, str) and content:
+                content = [{"type": "text", "text": content}]
+            if isinstance(content, list) and content:
+                content = content[:-1] + [{**content[-1], "cache_control": {"type": "ephemeral"}}]
+                formatted[-1] = {**formatted[-1], "content": content}
         
-        return system_prompt, formatted
+        return self._format_system(system_prompt, system_context), formatted
     
     def _format_tools(self, tools: Optional[list[dict]]) -> Optional[list[dict]]:
         """Convert OpenAI tool format to Anthropic format."""
         if not tools:
             return None
-        
+        return cached_tool_translation(self._tool_cache, tools, self._translate_tools)
+    
+    @staticmethod
+    def _translate_tools(tools: list[dict]) -> Optional[list[dict]]:
+        """Build the Anthropic tool list for OpenAI-format schemas."""
         anthropic_tools = []
         for tool in tools:
             if tool.get("type") == "function":
@@ -305,16 +603,25 @@ class AnthropicProvider(LLMProvider):
                     "input_schema": func.get("parameters", {"type": "object", "properties": {}}),
                 })
         
-        return anthropic_tools if anthropic_tools else None
+        if not anthropic_tools:
+            return None
+        
+        # Tools come first in the prompt; a breakpoint after the last one
+        # caches them even when the system prompt differs
+        anthropic_tools[-1]["cache_control"] = {"type": "ephemeral"}
+        return anthropic_tools
     
     async def chat(
         self,
         messages: list[ChatMessage],
         tools: Optional[list[dict]] = None,
         system_prompt: Optional[str] = None,
+        system_context: Optional[str] = None,
     ) -> tuple[str, Optional[list[ToolCall]]]:
         """Non-streaming chat completion."""
-        system, formatted_messages = self._format_messages(messages, system_prompt)
+        system, formatted_messages = self._format_messages(
+            messages, system_prompt, system_context
+        )
         anthropic_tools = self._format_tools(tools)
         
         kwargs = {
@@ -349,9 +656,12 @@ class AnthropicProvider(LLMProvider):
         messages: list[ChatMessage],
         tools: Optional[list[dict]] = None,
         system_prompt: Optional[str] = None,
+        system_context: Optional[str] = None,
     ) -> AsyncGenerator[StreamEvent, None]:
         """Stream chat completions with tool calling support."""
-        system, formatted_messages = self._format_messages(messages, system_prompt)
+        system, formatted_messages = self._format_messages(
+            messages, system_prompt, system_context
+        )
         anthropic_tools = self._format_tools(tools)
         
         kwargs = {
@@ -368,9 +678,9 @@ class AnthropicProvider(LLMProvider):
         try:
             yield StreamEvent(type="start")
             
-            full_content = ""
+            content_parts: list[str] = []
             current_tool: Optional[dict] = None
-            tool_input_json = ""
+            tool_input_parts: list[str] = []
             
             async with self.client.messages.stream(**kwargs) as stream:
                 async for event in stream:
@@ -381,101 +691,156 @@ class AnthropicProvider(LLMProvider):
                                     "id": event.content_block.id,
                                     "name": event.content_block.name,
                                 }
-                                tool_input_json = ""
+                                tool_input_parts = []
                     
                     elif event.type == "content_block_delta":
-                        if hasattr(event.delta, "text"):
-                            full_content += event.delta.text
-                            yield StreamEvent(type="token", content=event.delta.text)
-                        elif hasattr(event.delta, "partial_json"):
-                            tool_input_json += event.delta.partial_json
+                        text = getattr(event.delta, "text", None)
+                        if text is not None:
+                            content_parts.append(text)
+                            yield StreamEvent(type="token", content=text)
+                        else:
+                            partial_json = getattr(event.delta, "partial_json", None)
+                            if partial_json is not None:
+                                tool_input_parts.append(partial_json)
                     
                     elif event.type == "content_block_stop":
                         if current_tool:
-                            try:
-                                args = json.loads(tool_input_json) if tool_input_json else {}
-                            except json.JSONDecodeError:
-                                args = {}
-                            
                             yield StreamEvent(
                                 type="tool_call",
                                 tool_name=current_tool["name"],
                                 tool_call_id=current_tool["id"],
-                                tool_args=args,
+                                tool_args=decode_tool_arguments(tool_input_parts),
                             )
                             current_tool = None
-                            tool_input_json = ""
+                            tool_input_parts = []
             
-            yield StreamEvent(type="end", full_response=full_content)
+            yield StreamEvent(type="end", full_response="".join(content_parts))
         
         except Exception as e:
-            logger.error(f"Anthropic streaming error: {e}")
+            logger.exception("Anthropic streaming error: %s", e)
             yield StreamEvent(type="error", content=str(e))
 
 
+# API keys genai.configure() has already been called with; the SDK's
+# configuration is process-global, so each key only needs setting once
+_configured_gemini_keys: set[str] = set()
+
+# GenerativeModel instances kept per provider, keyed by the static system
+# prompt; normally there is only one
+GEMINI_MODEL_CACHE_SIZE = 4
+
+
 class GeminiProvider(LLMProvider):
     """Google Gemini implementation with streaming and tool calling."""
     
     def __init__(self, model: str = "gemini-1.5-pro", api_key: Optional[str] = None):
         import google.generativeai as genai
         
-        if api_key:
+        if api_key and api_key not in _configured_gemini_keys:
             genai.configure(api_key=api_key)
+            _configured_gemini_keys.add(api_key)
         
         self.model_name = model
         self.genai = genai
+        self._tool_cache: OrderedDict = OrderedDict()
+        self._model_cache: OrderedDict = OrderedDict()
+        self._message_cache: OrderedDict = OrderedDict()
+    
+    def _get_model(self, system: Optional[str]):
+        """
+        Return a GenerativeModel for this system instruction, reusing recent ones.
+        
+        Only the static system prompt is used here; per-turn context goes in
+        the request contents, so one model serves every turn.
+        """
+        model = self._model_cache.get(system)
+        if model is not None:
+            self._model_cache.move_to_end(system)
+            return model
+        
+        model_kwargs = {}
+        if system:
+            model_kwargs["system_instruction"] = system
+        
+        model = self.genai.GenerativeModel(
+            model_name=self.model_name,
+            **model_kwargs
+        )
+        self._model_cache[system] = model
+        if len(self._model_cache) > GEMINI_MODEL_CACHE_SIZE:
+            self._model_cache.popitem(last=False)
+        return model
+    
+    @staticmethod
+    def _format_message(msg: ChatMessage) -> Optional[dict]:
+        """Convert one ChatMessage to Gemini format."""
+        if msg.role == "user":
+            return {
+                "role": "user",
+                "parts": [msg.content]
+            }
+        elif msg.role == "assistant":
+            parts = []
+            if msg.content:
+                parts.append(msg.content)
+            if msg.tool_calls:
+                for tc in msg.tool_calls:
+                    parts.append({
+                        "function_call": {
+                            "name": tc.name,
+                            "args": tc.arguments
+                        }
+                    })
+            return {
+                "role": "model",
+                "parts": parts if parts else [""]
+            }
+        elif msg.role == "tool":
+            return {
+                "role": "user",
+                "parts": [{
+                    "function_response": {
+                        "name": msg.name or "unknown",
+                        "response": {"result": msg.content}
+                    }
+                }]
+            }
+        # Gemini handles system instruction separately
+        return None
     
     def _format_messages(
         self,
         messages: list[ChatMessage],
-        system_prompt: Optional[str] = None
-    ) -> tuple[Optional[str], list[dict]]:
-        """Convert ChatMessage objects to Gemini format."""
-        history = []
-        
-        for msg in messages:
-            if msg.role == "system":
-                # Gemini handles system instruction separately
-                continue
-            elif msg.role == "user":
-                history.append({
-                    "role": "user",
-                    "parts": [msg.content]
-                })
-            elif msg.role == "assistant":
-                parts = []
-                if msg.content:
-                    parts.append(msg.content)
-                if msg.tool_calls:
-                    for tc in msg.tool_calls:
-                        parts.append({
-                            "function_call": {
-                                "name": tc.name,
-                                "args": tc.arguments
-                            }
-                        })
-                history.append({
-                    "role": "model",
-                    "parts": parts if parts else [""]
-                })
-            elif msg.role == "tool":
-                history.append({
-                    "role": "user",
-                    "parts": [{
-                        "function_response": {
-                            "name": msg.name or "unknown",
-                            "response": {"result": msg.content}
-                        }
-                    }]
-                })
+        system_context: Optional[str] = None
+    ) -> list[dict]:
+        """
+        Convert ChatMessage objects to the request contents.
+        
+        system_context is sent as a leading part of the latest user turn,
+        which is copied so the cached formatted message is left as it was.
+        """
+        history = cached_message_formatting(self._message_cache, messages, self._format_message)
+        if not system_context:
+            return history or [""]
         
-        return system_prompt, history
+        for i in range(len(history) - 1, -1, -1):
+            turn = history[i]
+            # Tool results are user turns too; keep the context on a text turn
+            if turn["role"] == "user" and all(isinstance(part, str) for part in turn["parts"]):
+                contents = list(history)
+                contents[i] = {"role": "user", "parts": [system_context, *turn["parts"]]}
+                return contents
+        return [{"role": "user", "parts": [system_context]}, *history]
     
     def _format_tools(self, tools: Optional[list[dict]]) -> Optional[list]:
         """Convert OpenAI tool format to Gemini format."""
         if not tools:
             return None
-        
+        return cached_tool_translation(self._tool_cache, tools, self._translate_tools)
+    
+    @staticmethod
+    def _translate_tools(tools: list[dict]) -> Optional[list]:
+        """Build the Gemini tool list for OpenAI-format schemas."""
         function_declarations = []
         for tool in tools:
             if tool.get("type") == "function":
@@ -496,32 +861,21 @@ class GeminiProvider(LLMProvider):
         messages: list[ChatMessage],
         tools: Optional[list[dict]] = None,
         system_prompt: Optional[str] = None,
+        system_context: Optional[str] = None,
     ) -> tuple[str, Optional[list[ToolCall]]]:
         """Non-streaming chat completion."""
-        system, history = self._format_messages(messages, system_prompt)
         gemini_tools = self._format_tools(tools)
+        model = self._get_model(system_prompt)
         
-        # Create model with system instruction
-        model_kwargs = {}
-        if system:
-            model_kwargs["system_instruction"] = system
-        
-        model = self.genai.GenerativeModel(
-            model_name=self.model_name,
-            **model_kwargs
-        )
-        
-        # Start chat with history (excluding the last message which we'll send)
-        chat_history = history[:-1] if len(history) > 1 else []
-        last_message = history[-1]["parts"] if history else [""]
-        
-        chat = model.start_chat(history=chat_history)
+        # The whole history goes in one stateless request, so no chat session
+        # is created per call
+        contents = self._format_messages(messages, system_context)
         
         # Generate response
         generation_config = {"candidate_count": 1}
         
-        response = await chat.send_message_async(
-            last_message,
+        response = await model.generate_content_async(
+            contents,
             generation_config=generation_config,
             tools=gemini_tools
         )
@@ -531,10 +885,12 @@ class GeminiProvider(LLMProvider):
         tool_calls = []
         
         for part in response.parts:
-            if hasattr(part, "text") and part.text:
-                text_content += part.text
-            elif hasattr(part, "function_call"):
-                fc = part.function_call
+            text = getattr(part, "text", None)
+            if text:
+                text_content += text
+                continue
+            fc = getattr(part, "function_call", None)
+            if fc is not None:
                 tool_calls.append(ToolCall(
                     id=f"gemini_{fc.name}_{len(tool_calls)}",
                     name=fc.name,
@@ -548,75 +904,80 @@ class GeminiProvider(LLMProvider):
         messages: list[ChatMessage],
         tools: Optional[list[dict]] = None,
         system_prompt: Optional[str] = None,
+        system_context: Optional[str] = None,
     ) -> AsyncGenerator[StreamEvent, None]:
         """Stream chat completions with tool calling support."""
-        system, history = self._format_messages(messages, system_prompt)
         gemini_tools = self._format_tools(tools)
+        model = self._get_model(system_prompt)
         
-        # Create model with system instruction
-        model_kwargs = {}
-        if system:
-            model_kwargs["system_instruction"] = system
-        
-        model = self.genai.GenerativeModel(
-            model_name=self.model_name,
-            **model_kwargs
-        )
-        
-        # Start chat with history (excluding the last message which we'll send)
-        chat_history = history[:-1] if len(history) > 1 else []
-        last_message = history[-1]["parts"] if history else [""]
-        
-        chat = model.start_chat(history=chat_history)
+        # The whole history goes in one stateless request, so no chat session
+        # is created per call
+        contents = self._format_messages(messages, system_context)
         
         try:
             yield StreamEvent(type="start")
             
-            full_content = ""
+            content_parts: list[str] = []
             tool_calls = []
             
             # Generate streaming response
-            response = await chat.send_message_async(
-                last_message,
+            response = await model.generate_content_async(
+                contents,
                 tools=gemini_tools,
                 stream=True
             )
             
+            # Local names skip a global lookup per part
+            stream_event = StreamEvent
+            tool_call = ToolCall
+            
             async for chunk in response:
                 for part in chunk.parts:
-                    if hasattr(part, "text") and part.text:
-                        full_content += part.text
-                        yield StreamEvent(type="token", content=part.text)
-                    elif hasattr(part, "function_call"):
-                        fc = part.function_call
-                        tc = ToolCall(
+                    text = getattr(part, "text", None)
+                    if text:
+                        content_parts.append(text)
+                        yield stream_event(type="token", content=text)
+                        continue
+                    fc = getattr(part, "function_call", None)
+                    if fc is not None:
+                        tc = tool_call(
                             id=f"gemini_{fc.name}_{len(tool_calls)}",
                             name=fc.name,
                             arguments=dict(fc.args) if fc.args else {},
                         )
                         tool_calls.append(tc)
-                        yield StreamEvent(
+                        yield stream_event(
                             type="tool_call",
                             tool_name=tc.name,
                             tool_call_id=tc.id,
                             tool_args=tc.arguments,
                         )
             
-            yield StreamEvent(type="end", full_response=full_content)
+            yield StreamEvent(type="end", full_response="".join(content_parts))
         
         except Exception as e:
-            logger.error(f"Gemini streaming error: {e}")
+            logger.exception("Gemini streaming error: %s", e)
             yield StreamEvent(type="error", content=str(e))
 
 
 class MockProvider(LLMProvider):
     """Mock provider for testing without API calls."""
     
+    def __init__(self, inter_token_delay_s: float = 0.0, chunk_size: int = 8):
+        """
+        Args:
+            inter_token_delay_s: Pause between chunks; set above 0 for a typewriter effect
+            chunk_size: Words per token event
+        """
+        self.inter_token_delay_s = inter_token_delay_s
+        self.chunk_size = max(1, chunk_size)
+    
     async def chat(
         self,
         messages: list[ChatMessage],
         tools: Optional[list[dict]] = None,
         system_prompt: Optional[str] = None,
+        system_context: Optional[str] = None,
     ) -> tuple[str, Optional[list[ToolCall]]]:
         """Return a mock response."""
         last_msg = messages[-1].content if messages else "empty"
@@ -627,51 +988,71 @@ class MockProvider(LLMProvider):
         messages: list[ChatMessage],
         tools: Optional[list[dict]] = None,
         system_prompt: Optional[str] = None,
+        system_context: Optional[str] = None,
     ) -> AsyncGenerator[StreamEvent, None]:
         """Stream a mock response."""
-        import asyncio
-        
         yield StreamEvent(type="start")
         
         last_msg = messages[-1].content if messages else "empty"
         response = f"At once, Sir. I received your message: {last_msg}"
         
-        for word in response.split(" "):
-            yield StreamEvent(type="token", content=word + " ")
-            await asyncio.sleep(0.05)
+        words = response.split(" ")
+        for start in range(0, len(words), self.chunk_size):
+            chunk = words[start:start + self.chunk_size]
+            yield StreamEvent(type="token", content=" ".join(chunk) + " ")
+            if self.inter_token_delay_s > 0:
+                await asyncio.sleep(self.inter_token_delay_s)
         
         yield StreamEvent(type="end", full_response=response)
 
 
+# Keys an n8n webhook may put its reply under, in priority order
+N8N_RESPONSE_KEYS = ("response", "output", "text")
+
+# Seconds to wait for a connection to the webhook; an unreachable host
+# fails fast instead of waiting out the full reply timeout
+N8N_CONNECT_TIMEOUT = 5.0
+
+
 class N8NLegacyProvider(LLMProvider):
     """Legacy n8n webhook provider for backwards compatibility."""
     
     def __init__(self, webhook_url: str, timeout: int = 120):
+        import httpx
+        
         self.webhook_url = webhook_url
         self.timeout = timeout
+        # Pooled client shared by every call so webhook requests reuse connections
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=N8N_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            http2=True,
+        )
+    
+    async def aclose(self):
+        """Close the pooled HTTP connections."""
+        await self._client.aclose()
     
     async def chat(
         self,
         messages: list[ChatMessage],
         tools: Optional[list[dict]] = None,
         system_prompt: Optional[str] = None,
+        system_context: Optional[str] = None,
     ) -> tuple[str, Optional[list[ToolCall]]]:
         """Send message via n8n webhook (no tool support)."""
-        import httpx
-        
         last_msg = messages[-1].content if messages else ""
         session_id = "default"
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    self.webhook_url,
-                    json={"message": last_msg, "sessionId": session_id},
-                )
-                result = response.json()
-                
-                text = result.get("response") or result.get("output") or result.get("text") or ""
-                return text, None
+            response = await self._client.post(
+                self.webhook_url,
+                json={"message": last_msg, "sessionId": session_id},
+            )
+            result = msgspec.json.decode(response.content)
+            
+            text = next(filter(None, map(result.get, N8N_RESPONSE_KEYS)), "")
+            return text, None
         except Exception as e:
             logger.error(f"n8n webhook error: {e}")
             return f"Error: {e}", None
@@ -681,17 +1062,357 @@ class N8NLegacyProvider(LLMProvider):
         messages: list[ChatMessage],
         tools: Optional[list[dict]] = None,
         system_prompt: Optional[str] = None,
+        system_context: Optional[str] = None,
     ) -> AsyncGenerator[StreamEvent, None]:
-        """n8n doesn't support streaming, so we fake it."""
+        """
+        Stream the webhook reply as it arrives.
+        
+        n8n webhooks with streaming enabled answer with newline-delimited
+        JSON ({"type": "item", "content": "..."} per chunk); those chunks are
+        forwarded as tokens. A regular single-object JSON reply is emitted
+        as one token once it is complete.
+        """
         yield StreamEvent(type="start")
         
-        response, _ = await self.chat(messages, tools, system_prompt)
+        last_msg = messages[-1].content if messages else ""
+        session_id = "default"
+        chunks: list[str] = []
+        # Lines that are not complete JSON objects, i.e. a multi-line body
+        unparsed: list[str] = []
         
-        # Emit the full response as one token
-        yield StreamEvent(type="token", content=response)
-        yield StreamEvent(type="end", full_response=response)
+        try:
+            async with self._client.stream(
+                "POST",
+                self.webhook_url,
+                json={"message": last_msg, "sessionId": session_id},
+            ) as response:
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    try:
+                        item = json.loads(line)
+                    except json.JSONDecodeError:
+                        unparsed.append(line)
+                        continue
+                    if not isinstance(item, dict):
+                        continue
+                    
+                    if item.get("type") == "item":
+                        text = item.get("content") or ""
+                    elif item.get("type") == "error":
+                        yield StreamEvent(type="error", content=item.get("content") or "n8n workflow error")
+                        return
+                    else:
+                        text = next(filter(None, map(item.get, N8N_RESPONSE_KEYS)), "")
+                    
+                    if text:
+                        chunks.append(text)
+                        yield StreamEvent(type="token", content=text)
+            
+            if not chunks and unparsed:
+                result = json.loads("\n".join(unparsed))
+                text = next(filter(None, map(result.get, N8N_RESPONSE_KEYS)), "")
+                if text:
+                    chunks.append(text)
+                    yield StreamEvent(type="token", content=text)
+        
+        except Exception as e:
+            logger.error(f"n8n webhook error: {e}")
+            yield StreamEvent(type="error", content=str(e))
+            return
+        
+        yield StreamEvent(type="end", full_response="".join(chunks))
+
+
+# Replies kept by CachingProvider
+RESPONSE_CACHE_SIZE = 4096
+# Characters per token event when replaying a cached reply
+CACHED_REPLY_CHUNK_CHARS = 20
 
 
+class CachingProvider(LLMProvider):
+    """
+    Exact-match reply cache in front of another provider.
+    
+    The key covers the system prompt and context, the tool definitions and
+    the whole conversation, so a hit is a request identical to an earlier
+    one. Replies that call tools are never cached (tool calls have side
+    effects), and neither are conversations that already contain tool
+    calls. Entries expire after ttl seconds.
+    """
+    
+    def __init__(self, provider: LLMProvider, ttl: int, maxsize: int = RESPONSE_CACHE_SIZE):
+        self.provider = provider
+        self.ttl = ttl
+        self.maxsize = maxsize
+        # key -> (expires_at, reply), least recently used first
+        self._cache: OrderedDict[bytes, tuple[float, str]] = OrderedDict()
+    
+    @staticmethod
+    def _key(
+        messages: list[ChatMessage],
+        tools: Optional[list[dict]],
+        system_prompt: Optional[str],
+        system_context: Optional[str],
+    ) -> Optional[bytes]:
+        if any(msg.tool_calls or msg.role == "tool" for msg in messages):
+            return None
+        payload = json.dumps(
+            [system_prompt, system_context, tools, [(msg.role, msg.content) for msg in messages]],
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.blake2b(payload.encode(), digest_size=16).digest()
+    
+    def _get(self, key: Optional[bytes]) -> Optional[str]:
+        if key is None:
+            return None
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, reply = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return reply
+    
+    def _put(self, key: Optional[bytes], reply: str):
+        if key is None or not reply:
+            return
+        self._cache[key] = (time.monotonic() + self.ttl, reply)
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+    
+    async def chat(
+        self,
+        messages: list[ChatMessage],
+        tools: Optional[list[dict]] = None,
+        system_prompt: Optional[str] = None,
+        system_context: Optional[str] = None,
+    ) -> tuple[str, Optional[list[ToolCall]]]:
+        """Return a cached reply, or ask the wrapped provider and cache it."""
+        key = self._key(messages, tools, system_prompt, system_context)
+        cached = self._get(key)
+        if cached is not None:
+            return cached, None
+        
+        text, tool_calls = await self.provider.chat(messages, tools, system_prompt, system_context)
+        if not tool_calls:
+            self._put(key, text)
+        return text, tool_calls
+    
+    async def chat_stream(
+        self,
+        messages: list[ChatMessage],
+        tools: Optional[list[dict]] = None,
+        system_prompt: Optional[str] = None,
+        system_context: Optional[str] = None,
+    ) -> AsyncGenerator[StreamEvent, None]:
+        """Replay a cached reply as a stream, or stream and cache a fresh one."""
+        key = self._key(messages, tools, system_prompt, system_context)
+        cached = self._get(key)
+        if cached is not None:
+            yield StreamEvent(type="start")
+            for i in range(0, len(cached), CACHED_REPLY_CHUNK_CHARS):
+                yield StreamEvent(type="token", content=cached[i:i + CACHED_REPLY_CHUNK_CHARS])
+            yield StreamEvent(type="end", full_response=cached)
+            return
+        
+        cacheable = True
+        async for event in self.provider.chat_stream(messages, tools, system_prompt, system_context):
+            if event.type in ("tool_call", "error"):
+                cacheable = False
+            elif event.type == "end" and cacheable:
+                self._put(key, event.full_response or "")
+            yield event
+
+
+# Running summaries of trimmed history, each stored under the last message
+# it covers
+HISTORY_SUMMARY_CACHE_SIZE = 256
+
+HISTORY_SUMMARY_PROMPT = (
+    "Summarize the earlier part of this conversation in a few sentences. "
+    "Keep names, decisions, facts and open requests; leave out small talk.\n\n"
+)
+
+HISTORY_SUMMARY_UPDATE_PROMPT = (
+    "Here is a summary of the earlier part of a conversation, followed by "
+    "the messages that came after it. Rewrite the summary in a few sentences "
+    "so it also covers those messages. Keep names, decisions, facts and open "
+    "requests; leave out small talk.\n\nSummary so far:\n{summary}\n\nNew messages:\n"
+)
+
+
+class TrimmingProvider(LLMProvider):
+    """
+    Bounds the conversation sent to another provider.
+    
+    Messages older than the newest max_chars of content (and
+    max_recent_messages entries) are replaced by a running summary, written
+    by the wrapped provider and sent with the system context. The current
+    turn (from the last user message on) is always kept whole.
+    
+    The summary only moves when the messages after it overflow the budget;
+    it then takes in the newly dropped messages and the cut moves to half
+    the budget, so the next several turns reuse it without another call.
+    Conversation history carries the same ChatMessage objects from turn to
+    turn, so a summary is found again through the last message it covers.
+    """
+    
+    def __init__(
+        self,
+        provider: LLMProvider,
+        max_chars: int,
+        max_recent_messages: int = 20,
+        maxsize: int = HISTORY_SUMMARY_CACHE_SIZE,
+    ):
+        self.provider = provider
+        self.max_chars = max_chars
+        self.max_recent_messages = max_recent_messages
+        self.maxsize = maxsize
+        # id(last covered message) -> (message, summary), least recently used first
+        self._summaries: OrderedDict[int, tuple[ChatMessage, str]] = OrderedDict()
+    
+    def _find_summary(self, messages: list[ChatMessage]) -> tuple[int, str]:
+        """Index of the last message covered by a stored summary (-1 if none) and that summary."""
+        for i in range(len(messages) - 1, -1, -1):
+            entry = self._summaries.get(id(messages[i]))
+            # The entry holds its message, so a matching id is the same object
+            if entry is not None:
+                self._summaries.move_to_end(id(messages[i]))
+                return i, entry[1]
+        return -1, ""
+    
+    @staticmethod
+    def _split(
+        messages: list[ChatMessage],
+        first: int,
+        max_chars: int,
+        max_messages: int,
+    ) -> int:
+        """Index of the first message kept when messages[first:] is bounded by the limits."""
+        last_user = next(
+            (i for i in range(len(messages) - 1, -1, -1) if messages[i].role == "user"),
+            len(messages) - 1,
+        )
+        
+        start = len(messages)
+        used = 0
+        while start > first and len(messages) - start < max_messages:
+            used += len(messages[start - 1].content or "")
+            if used > max_chars:
+                break
+            start -= 1
+        
+        start = min(start, last_user)
+        # A tool result is never kept without the call that produced it
+        while start < last_user and messages[start].role == "tool":
+            start += 1
+        return max(start, first)
+    
+    async def _summarize(self, summary: str, dropped: list[ChatMessage]) -> Optional[str]:
+        """Fold dropped messages into the running summary; None if the call failed."""
+        transcript = "\n".join(
+            f"{msg.role.upper()}: {msg.content}" for msg in dropped if msg.content
+        )
+        if not transcript:
+            return summary
+        
+        if summary:
+            prompt = HISTORY_SUMMARY_UPDATE_PROMPT.format(summary=summary) + transcript
+        else:
+            prompt = HISTORY_SUMMARY_PROMPT + transcript
+        
+        try:
+            updated, _ = await self.provider.chat(
+                messages=[ChatMessage(role="user", content=prompt)],
+            )
+        except Exception as e:
+            logger.warning(f"History summary failed, dropping older turns: {e}")
+            return None
+        return updated.strip()
+    
+    async def _trim(
+        self,
+        messages: list[ChatMessage],
+        system_context: Optional[str],
+    ) -> tuple[list[ChatMessage], Optional[str]]:
+        """Return the messages to send and the system context with any summary added."""
+        covered, summary = self._find_summary(messages)
+        first = covered + 1
+        
+        if self._split(messages, first, self.max_chars, self.max_recent_messages) > first:
+            # Cut to half the budget so following turns fit without re-summarizing
+            start = self._split(
+                messages, first, self.max_chars // 2, max(1, self.max_recent_messages // 2)
+            )
+            updated = await self._summarize(summary, messages[first:start])
+            if updated is not None:
+                summary = updated
+                last = messages[start - 1]
+                self._summaries[id(last)] = (last, summary)
+                if len(self._summaries) > self.maxsize:
+                    self._summaries.popitem(last=False)
+            first = start
+        
+        if summary:
+            system_context = (system_context or "") + f"\n\n## Earlier in this conversation\n{summary}\n"
+        return messages[first:], system_context
+    
+    async def chat(
+        self,
+        messages: list[ChatMessage],
+        tools: Optional[list[dict]] = None,
+        system_prompt: Optional[str] = None,
+        system_context: Optional[str] = None,
+    ) -> tuple[str, Optional[list[ToolCall]]]:
+        """Chat with the trimmed conversation."""
+        messages, system_context = await self._trim(messages, system_context)
+        return await self.provider.chat(messages, tools, system_prompt, system_context)
+    
+    async def chat_stream(
+        self,
+        messages: list[ChatMessage],
+        tools: Optional[list[dict]] = None,
+        system_prompt: Optional[str] = None,
+        system_context: Optional[str] = None,
+    ) -> AsyncGenerator[StreamEvent, None]:
+        """Stream a reply to the trimmed conversation."""
+        messages, system_context = await self._trim(messages, system_context)
+        async for event in self.provider.chat_stream(messages, tools, system_prompt, system_context):
+            yield event
+
+
+def _create_n8n_provider(model, api_key, webhook_url, timeout, verify_ssl) -> LLMProvider:
+    if not webhook_url:
+        raise ValueError("webhook_url required for n8n provider")
+    return N8NLegacyProvider(webhook_url=webhook_url, timeout=timeout)
+
+
+# Provider type -> factory(model, api_key, webhook_url, timeout, verify_ssl)
+_PROVIDER_FACTORIES = {
+    "openai": lambda model, api_key, webhook_url, timeout, verify_ssl: OpenAIProvider(
+        model=model or "gpt-4o",
+        api_key=api_key,
+        verify_ssl=verify_ssl,
+    ),
+    "anthropic": lambda model, api_key, webhook_url, timeout, verify_ssl: AnthropicProvider(
+        model=model or "claude-3-opus-20240229",
+        api_key=api_key,
+    ),
+    "gemini": lambda model, api_key, webhook_url, timeout, verify_ssl: GeminiProvider(
+        model=model or "gemini-1.5-pro",
+        api_key=api_key,
+    ),
+    "n8n": _create_n8n_provider,
+    "mock": lambda model, api_key, webhook_url, timeout, verify_ssl: MockProvider(),
+}
+
+
+@lru_cache(maxsize=None)
 def get_llm_provider(
     provider_type: str = "openai",
     model: Optional[str] = None,
@@ -703,6 +1424,11 @@ def get_llm_provider(
     """
     Get an LLM provider instance.
     
+    Providers hold no per-request state, so one instance (and its API
+    client) is shared by every caller asking for the same configuration.
+    Arguments form the cache key and must be hashable (API keys are plain
+    strings).
+    
     Args:
         provider_type: Type of provider ('openai', 'anthropic', 'gemini', 'n8n', 'mock')
         model: Model name (provider-specific)
@@ -714,30 +1440,10 @@ def get_llm_provider(
     Returns:
         LLMProvider instance
     """
-    if provider_type == "openai":
-        return OpenAIProvider(
-            model=model or "gpt-4o",
-            api_key=api_key,
-            verify_ssl=verify_ssl,
-        )
-    elif provider_type == "anthropic":
-        return AnthropicProvider(
-            model=model or "claude-3-opus-20240229",
-            api_key=api_key,
-        )
-    elif provider_type == "gemini":
-        return GeminiProvider(
-            model=model or "gemini-1.5-pro",
-            api_key=api_key,
-        )
-    elif provider_type == "n8n":
-        if not webhook_url:
-            raise ValueError("webhook_url required for n8n provider")
-        return N8NLegacyProvider(webhook_url=webhook_url, timeout=timeout)
-    elif provider_type == "mock":
-        return MockProvider()
-    else:
+    factory = _PROVIDER_FACTORIES.get(provider_type)
+    if factory is None:
         raise ValueError(f"Unknown provider type: {provider_type}")
+    return factory(model, api_key, webhook_url, timeout, verify_ssl)
 
 
 # Create provider from settings
@@ -755,7 +1461,7 @@ def create_provider_from_settings() -> LLMProvider:
     elif settings.llm_provider == "gemini":
         api_key = settings.gemini_api_key
     
-    return get_llm_provider(
+    provider = get_llm_provider(
         provider_type=settings.llm_provider,
         model=settings.llm_model,
         api_key=api_key,
@@ -763,3 +1469,10 @@ def create_provider_from_settings() -> LLMProvider:
         timeout=settings.n8n_timeout_seconds,
         verify_ssl=settings.verify_ssl,
     )
+    
+    # Trimming sits inside the reply cache, so cache hits skip summarizing
+    if settings.llm_history_max_chars > 0:
+        provider = TrimmingProvider(provider, max_chars=settings.llm_history_max_chars)
+    if settings.llm_response_cache_ttl > 0:
+        provider = CachingProvider(provider, ttl=settings.llm_response_cache_ttl)
+    return provider
@@ -1,16 +1,131 @@
 """n8n webhook client for communicating with Jarvis."""
+import asyncio
 import httpx
-import json
 import logging
 import re
+import msgspec
 from typing import Optional, AsyncGenerator, Tuple
 from config import get_settings
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
-# Set to True for verbose streaming debug output
-DEBUG_STREAMING = True
+# Set to True for verbose streaming output at INFO level; otherwise it is
+# logged only when this logger is at DEBUG
+DEBUG_STREAMING = False
+
+# Seconds to wait for a connection to n8n; the overall timeout covers slow
+# replies, but an unreachable host should fail fast
+N8N_CONNECT_TIMEOUT = 5.0
+
+# Reply bodies at least this large are decoded in a worker thread, so one
+# big response doesn't hold up every other session on the event loop
+LARGE_RESPONSE_BYTES = 1 << 20
+
+# Workflow nodes whose stream events are used; events from any other node
+# are ignored
+AI_AGENT_NODE = "AI Agent"
+RESPOND_NODE = "Respond to Webhook"
+
+
+# Bytes that change JSON scan state; runs of anything else are skipped by
+# the regex engine instead of a Python loop. All are ASCII, so they never
+# occur inside a multi-byte UTF-8 sequence and chunks can split anywhere.
+_JSON_STRUCTURAL = re.compile(rb'[{}"\\]')
+
+
+class _StreamJSONParser:
+    """
+    Incremental extractor for JSON objects concatenated in a byte stream.
+    
+    Scan state carries over between chunks, so each byte is examined once
+    however the stream is split, and an object's bytes are joined (and
+    decoded straight from UTF-8) only once it is complete.
+    """
+    
+    def __init__(self):
+        self._parts: list[bytes] = []  # Pieces of the object being scanned
+        self._depth = 0  # 0 between objects
+        self._in_string = False
+        self._escape = False  # The next character is escaped
+    
+    def feed(self, chunk: bytes) -> list[dict]:
+        """
+        Scan the next piece of the stream.
+        
+        Args:
+            chunk: Bytes received from the stream
+            
+        Returns:
+            Objects completed by this chunk, in stream order
+        """
+        objects = []
+        pos = 0
+        seg_start = 0
+        
+        while pos < len(chunk):
+            if self._depth == 0:
+                # n8n usually sends one object per line; a complete line is
+                # decoded as-is, and only lines that fail go to the scanner
+                newline = chunk.find(b"\n", pos)
+                if newline != -1:
+                    line = chunk[pos:newline].strip()
+                    if not line:
+                        pos = newline + 1
+                        continue
+                    if line[:1] == b"{":
+                        try:
+                            objects.append(msgspec.json.decode(line))
+                            pos = newline + 1
+                            continue
+                        except msgspec.DecodeError:
+                            pass
+                
+                # Skip any non-JSON text between objects (like newlines)
+                pos = chunk.find(b"{", pos)
+                if pos == -1:
+                    break
+                self._depth = 1
+                seg_start = pos
+                pos += 1
+                continue
+            
+            if self._escape:
+                self._escape = False
+                pos += 1
+                continue
+            
+            match = _JSON_STRUCTURAL.search(chunk, pos)
+            if match is None:
+                break
+            pos = match.end()
+            char = match.group()
+            
+            if self._in_string:
+                if char == b"\\":
+                    self._escape = True
+                elif char == b'"':
+                    self._in_string = False
+            elif char == b'"':
+                self._in_string = True
+            elif char == b"{":
+                self._depth += 1
+            elif char == b"}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(chunk[seg_start:pos])
+                    text = b"".join(self._parts)
+                    self._parts = []
+                    try:
+                        objects.append(msgspec.json.decode(text))
+                    except msgspec.DecodeError:
+                        # Not valid JSON, skip its opening brace and rescan
+                        chunk = text[1:] + chunk[pos:]
+                        pos = 0
+        
+        if self._depth:
+            self._parts.append(chunk[seg_start:])
+        return objects
 
 
 class N8NClient:
@@ -19,6 +134,22 @@ class N8NClient:
     def __init__(self, webhook_url: Optional[str] = None, timeout: Optional[int] = None):
         self.webhook_url = webhook_url or settings.n8n_webhook_url
         self.timeout = timeout or settings.n8n_timeout_seconds
+        # One pooled client for all requests so webhook calls reuse connections
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.timeout, connect=N8N_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            http2=True,
+        )
+    
+    async def aclose(self):
+        """Close the pooled HTTP connections."""
+        await self._client.aclose()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
     
     async def send_message(self, message: str, session_id: str) -> dict:
         """
@@ -36,103 +167,47 @@ class N8NClient:
             "sessionId": session_id,
         }
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    self.webhook_url,
-                    json=payload,
-                    timeout=self.timeout,
-                )
-                response.raise_for_status()
-                
-                # Try to parse as JSON
-                try:
-                    data = response.json()
-                    # Handle different response formats
-                    if isinstance(data, dict):
-                        return data
-                    elif isinstance(data, str):
-                        return {"response": data}
-                    else:
-                        return {"response": str(data)}
-                except:
-                    # If not JSON, return as plain text
-                    return {"response": response.text}
-                    
-            except httpx.TimeoutException:
-                return {
-                    "error": True,
-                    "response": "Request timed out. The AI is taking too long to respond.",
-                }
-            except httpx.HTTPStatusError as e:
-                return {
-                    "error": True,
-                    "response": f"HTTP error: {e.response.status_code}",
-                }
-            except Exception as e:
-                return {
-                    "error": True,
-                    "response": f"Connection error: {str(e)}",
-                }
-    
-    def _extract_json_objects(self, text: str) -> tuple[list[dict], str]:
-        """
-        Extract complete JSON objects from a text buffer.
-        Returns (list of parsed objects, remaining unparsed text).
-        """
-        objects = []
-        remaining = text
-        
-        # Try to find JSON objects by looking for matching braces
-        while remaining:
-            remaining = remaining.lstrip()
-            if not remaining.startswith('{'):
-                # Skip any non-JSON prefix (like newlines)
-                idx = remaining.find('{')
-                if idx == -1:
-                    break
-                remaining = remaining[idx:]
+        try:
+            response = await self._client.post(
+                self.webhook_url,
+                json=payload,
+            )
+            response.raise_for_status()
             
-            # Try to parse from the start
-            depth = 0
-            in_string = False
-            escape = False
-            end_idx = -1
-            
-            for i, char in enumerate(remaining):
-                if escape:
-                    escape = False
-                    continue
-                if char == '\\' and in_string:
-                    escape = True
-                    continue
-                if char == '"' and not escape:
-                    in_string = not in_string
-                    continue
-                if in_string:
-                    continue
-                if char == '{':
-                    depth += 1
-                elif char == '}':
-                    depth -= 1
-                    if depth == 0:
-                        end_idx = i + 1
-                        break
+            # Try to parse as JSON, straight from the body bytes
+            body = response.content
+            try:
+                if len(body) >= LARGE_RESPONSE_BYTES:
+                    data = await asyncio.to_thread(msgspec.json.decode, body)
+                else:
+                    data = msgspec.json.decode(body)
+            except msgspec.DecodeError:
+                # If not JSON, return as plain text
+                return {"response": response.text}
             
-            if end_idx > 0:
-                json_str = remaining[:end_idx]
-                try:
-                    obj = json.loads(json_str)
-                    objects.append(obj)
-                    remaining = remaining[end_idx:]
-                except json.JSONDecodeError:
-                    # Not valid JSON, skip this character and continue
-                    remaining = remaining[1:]
+            # Handle different response formats
+            if isinstance(data, dict):
+                return data
+            elif isinstance(data, str):
+                return {"response": data}
             else:
-                # Incomplete JSON, return what we have
-                break
-        
-        return objects, remaining
+                return {"response": str(data)}
+                
+        except httpx.TimeoutException:
+            return {
+                "error": True,
+                "response": "Request timed out. The AI is taking too long to respond.",
+            }
+        except httpx.HTTPStatusError as e:
+            return {
+                "error": True,
+                "response": f"HTTP error: {e.response.status_code}",
+            }
+        except Exception as e:
+            return {
+                "error": True,
+                "response": f"Connection error: {str(e)}",
+            }
     
     async def stream_message(
         self, 
@@ -161,8 +236,10 @@ class N8NClient:
         full_response = ""
         ai_agent_content = ""
         streaming_started = False
+        # Checked once per request rather than at every chunk
+        debug = DEBUG_STREAMING or logger.isEnabledFor(logging.DEBUG)
         
-        if DEBUG_STREAMING:
+        if debug:
             logger.info(f"Sending streaming request to: {self.webhook_url}")
         
         # Disable gzip encoding to enable true streaming
@@ -171,86 +248,93 @@ class N8NClient:
             "Accept-Encoding": "identity",  # Disable compression for streaming
         }
         
-        async with httpx.AsyncClient() as client:
-            try:
-                async with client.stream(
-                    "POST",
-                    self.webhook_url,
-                    json=payload,
-                    headers=headers,
-                    timeout=self.timeout,
-                ) as response:
-                    response.raise_for_status()
+        try:
+            async with self._client.stream(
+                "POST",
+                self.webhook_url,
+                json=payload,
+                headers=headers,
+            ) as response:
+                response.raise_for_status()
+                
+                if debug:
+                    logger.info(f"Got response, status: {response.status_code}")
+                
+                parser = _StreamJSONParser()
+                chunk_count = 0
+                
+                async for chunk in response.aiter_bytes():
+                    chunk_count += 1
                     
-                    if DEBUG_STREAMING:
-                        logger.info(f"Got response, status: {response.status_code}")
+                    if debug:
+                        logger.debug("Raw chunk #%d (%d bytes): %.80r...", chunk_count, len(chunk), chunk)
                     
-                    buffer = ""
-                    chunk_count = 0
+                    # Extract the JSON objects this chunk completes
+                    objects = parser.feed(chunk)
+                    # Item contents from this read, yielded together
+                    pending: list[str] = []
                     
-                    async for chunk in response.aiter_text():
-                        chunk_count += 1
-                        buffer += chunk
+                    for data in objects:
+                        event_type = data.get("type")
+                        metadata = data.get("metadata")
+                        node_name = metadata.get("nodeName", "") if metadata else ""
+                        content = data.get("content", "")
                         
-                        if DEBUG_STREAMING:
-                            logger.debug(f"Raw chunk #{chunk_count} ({len(chunk)} bytes): {chunk[:80]}...")
+                        if debug:
+                            logger.debug("Parsed: type=%s, node=%s, content=%.30s...", event_type, node_name, content or "")
                         
-                        # Extract all complete JSON objects from buffer
-                        objects, buffer = self._extract_json_objects(buffer)
-                        
-                        for data in objects:
-                            event_type = data.get("type")
-                            node_name = data.get("metadata", {}).get("nodeName", "")
-                            content = data.get("content", "")
-                            
-                            if DEBUG_STREAMING:
-                                logger.debug(f"Parsed: type={event_type}, node={node_name}, content={content[:30] if content else ''}...")
+                        # Only process AI Agent node for streaming
+                        if node_name == AI_AGENT_NODE:
+                            if event_type == "begin":
+                                if not streaming_started:
+                                    streaming_started = True
+                                    if debug:
+                                        logger.info(">>> Stream started (AI Agent begin)")
+                                    if pending:
+                                        yield ("chunk", "".join(pending))
+                                        pending = []
+                                    yield ("start", "")
                             
-                            # Only process AI Agent node for streaming
-                            if node_name == "AI Agent":
-                                if event_type == "begin":
-                                    if not streaming_started:
-                                        streaming_started = True
-                                        if DEBUG_STREAMING:
-                                            logger.info(">>> Stream started (AI Agent begin)")
-                                        yield ("start", "")
-                                
-                                elif event_type == "item" and content:
-                                    ai_agent_content += content
-                                    if DEBUG_STREAMING:
-                                        logger.info(f">>> Yielding chunk: '{content}'")
-                                    yield ("chunk", content)
-                                
-                                elif event_type == "end":
-                                    if DEBUG_STREAMING:
-                                        logger.info("AI Agent end received")
+                            elif event_type == "item" and content:
+                                ai_agent_content += content
+                                pending.append(content)
                             
-                            # Check for final response in "Respond to Webhook" node
-                            elif node_name == "Respond to Webhook" and event_type == "item":
-                                try:
-                                    # This contains the final JSON response
-                                    final_data = json.loads(content)
-                                    full_response = final_data.get("output", ai_agent_content)
-                                    if DEBUG_STREAMING:
-                                        logger.info(f"Got final response from Respond to Webhook: {len(full_response)} chars")
-                                except json.JSONDecodeError:
-                                    full_response = content or ai_agent_content
-                    
-                    # Use the full response if available, otherwise use accumulated content
-                    final_content = full_response or ai_agent_content
-                    if DEBUG_STREAMING:
-                        logger.info(f"Stream complete. Chunks: {chunk_count}, Final length: {len(final_content)}")
-                    yield ("end", final_content)
+                            elif event_type == "end":
+                                if debug:
+                                    logger.info("AI Agent end received")
                         
-            except httpx.TimeoutException:
-                logger.error("Streaming timeout")
-                yield ("error", "Request timed out. The AI is taking too long to respond.")
-            except httpx.HTTPStatusError as e:
-                logger.error(f"HTTP error: {e.response.status_code}")
-                yield ("error", f"HTTP error: {e.response.status_code}")
-            except Exception as e:
-                logger.error(f"Streaming error: {type(e).__name__}: {e}")
-                yield ("error", f"Connection error: {str(e)}")
+                        # Check for final response in "Respond to Webhook" node
+                        elif node_name == RESPOND_NODE and event_type == "item":
+                            try:
+                                # This contains the final JSON response
+                                final_data = msgspec.json.decode(content)
+                                full_response = final_data.get("output", ai_agent_content)
+                                if debug:
+                                    logger.info(f"Got final response from Respond to Webhook: {len(full_response)} chars")
+                            except msgspec.DecodeError:
+                                full_response = content or ai_agent_content
+                    
+                    if pending:
+                        batch = "".join(pending)
+                        if debug:
+                            logger.info(">>> Yielding chunk: '%s'", batch)
+                        yield ("chunk", batch)
+                
+                # Use the full response if available, otherwise use accumulated content
+                final_content = full_response or ai_agent_content
+                if debug:
+                    logger.info(f"Stream complete. Chunks: {chunk_count}, Final length: {len(final_content)}")
+                yield ("end", final_content)
+                    
+        except httpx.TimeoutException:
+            logger.error("Streaming timeout")
+            yield ("error", "Request timed out. The AI is taking too long to respond.")
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP error: {e.response.status_code}")
+            yield ("error", f"HTTP error: {e.response.status_code}")
+        except Exception as e:
+            logger.error(f"Streaming error: {type(e).__name__}: {e}")
+            yield ("error", f"Connection error: {str(e)}")
 
 
 # Global client instance
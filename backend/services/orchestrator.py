@@ -1,13 +1,13 @@
 """AI Orchestrator service with streaming and tool execution."""
 import asyncio
-import json
+import msgspec
 import logging
 from typing import AsyncGenerator, Optional
 from dataclasses import dataclass
 
 from services.llm_provider import (
     LLMProvider, ChatMessage, ToolCall, StreamEvent,
-    create_provider_from_settings,
+    batch_tokens, create_provider_from_settings,
 )
 from services.tool_registry import tool_registry
 from agents.router import AgentRouter
@@ -20,7 +20,7 @@ logger = logging.getLogger(__name__)
 
 
 
-@dataclass
+@dataclass(slots=True)
 class OrchestratorEvent:
     """Event emitted by the orchestrator during processing."""
     type: str  # "start", "token", "tool_call", "tool_result", "end", "error"
@@ -28,9 +28,15 @@ class OrchestratorEvent:
     tool_name: Optional[str] = None
     tool_args: Optional[dict] = None
     tool_result: Optional[dict] = None
+    tool_result_json: Optional[bytes] = None  # tool_result, already encoded
     full_response: Optional[str] = None
 
 
+# Events carry no per-request data in this case, and consumers only read
+# events, so one instance serves every request
+START_EVENT = OrchestratorEvent(type="start")
+
+
 class Orchestrator:
     """
     AI Orchestrator that manages conversation flow, tool execution, and streaming.
@@ -130,23 +136,26 @@ class Orchestrator:
             logger.warning(f"Failed to fetch durable facts: {e}")
             return ""
     
-    async def _build_system_prompt(self, base_prompt: str, user_query: str) -> str:
+    async def _build_memory_context(self, user_query: str) -> str:
         """
-        Build the full system prompt with durable facts and relevant summaries.
+        Build the per-request system context with durable facts and relevant summaries.
         
         Two-tier memory injection:
           1. Durable facts — always included, never decay
           2. Session summaries — recency-weighted semantic search
+        
+        Kept apart from the agent's static system prompt so providers can
+        cache the static part across requests.
         """
         if not self.include_summaries:
-            return base_prompt
+            return ""
         
         facts_context, summaries_context = await asyncio.gather(
             self._get_durable_facts(),
             self._search_relevant_summaries(user_query),
         )
         
-        return base_prompt + facts_context + summaries_context
+        return facts_context + summaries_context
     
     async def process_message(
         self,
@@ -158,28 +167,30 @@ class Orchestrator:
         
         Args:
             user_message: The user's message
-            conversation_history: Previous messages in the conversation
+            conversation_history: Previous messages in the conversation. The
+                list is taken over and extended in place with this turn's
+                messages, so pass one the caller does not reuse.
             
         Yields:
             OrchestratorEvent objects representing the processing flow
         """
-        messages = conversation_history.copy() if conversation_history else []
+        messages = conversation_history if conversation_history is not None else []
         messages.append(ChatMessage(role="user", content=user_message))
         
         # Route to the best domain agent
         agent = self.router.route(user_message)
-        tools = agent.get_tool_schemas()
+        # Providers take None for "no tools"; the list is the same every iteration
+        tools = agent.get_tool_schemas() or None
         llm = agent.get_llm_provider() or self.llm_provider
         max_iters = agent.config.max_tool_iterations
         
-        logger.debug(f"Agent '{agent.config.name}' loaded {len(tools)} tools")
+        logger.debug(f"Agent '{agent.config.name}' loaded {len(tools or ())} tools")
         
-        # Build full system prompt with memory injection
-        system_prompt = await self._build_system_prompt(
-            agent.get_system_prompt(), user_message,
-        )
+        # Static agent prompt plus per-request memory context
+        system_prompt = agent.get_system_prompt()
+        system_context = await self._build_memory_context(user_message)
         
-        yield OrchestratorEvent(type="start")
+        yield START_EVENT
         
         full_response = ""
         iteration = 0
@@ -192,11 +203,13 @@ class Orchestrator:
                 current_text = ""
                 
                 # Stream response from LLM
-                async for event in llm.chat_stream(
+                # Token runs are merged so each hop below handles fewer events
+                async for event in batch_tokens(llm.chat_stream(
                     messages=messages,
-                    tools=tools if tools else None,
+                    tools=tools,
                     system_prompt=system_prompt,
-                ):
+                    system_context=system_context or None,
+                )):
                     if event.type == "token":
                         current_text += event.content
                         yield OrchestratorEvent(type="token", content=event.content)
@@ -230,25 +243,31 @@ class Orchestrator:
                         tool_calls=pending_tool_calls,
                     ))
                     
-                    # Execute each tool
+                    # Tool calls in one turn are independent, so they run
+                    # concurrently; results are reported and added to the
+                    # history in call order, keeping the next request stable
                     for tool_call in pending_tool_calls:
                         logger.info(f"Executing tool: {tool_call.name} with args: {tool_call.arguments}")
-                        
-                        result = await tool_registry.execute(
-                            tool_call.name,
-                            tool_call.arguments,
-                        )
-                        
+                    
+                    results = await asyncio.gather(*(
+                        tool_registry.execute(tool_call.name, tool_call.arguments)
+                        for tool_call in pending_tool_calls
+                    ))
+                    
+                    for tool_call, result in zip(pending_tool_calls, results):
+                        # Encoded once for both the client frame and the history
+                        result_json = msgspec.json.encode(result)
                         yield OrchestratorEvent(
                             type="tool_result",
                             tool_name=tool_call.name,
                             tool_result=result,
+                            tool_result_json=result_json,
                         )
                         
                         # Add tool result to messages
                         messages.append(ChatMessage(
                             role="tool",
-                            content=json.dumps(result),
+                            content=result_json.decode(),
                             tool_call_id=tool_call.id,
                             name=tool_call.name,
                         ))
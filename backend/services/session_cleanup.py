@@ -2,8 +2,9 @@
 import logging
 from datetime import datetime, timezone
 from typing import Optional, List
-from sqlalchemy import select, delete, text
+from sqlalchemy import Row, select, delete, func, text
 from sqlalchemy.ext.asyncio import AsyncSession
+from config import get_settings
 from models.session import Session
 from models.message import Message
 from models.chat_summary import ChatSummary
@@ -16,6 +17,10 @@ logger = logging.getLogger(__name__)
 # Higher = more selective (0.0 to 1.0)
 SIMILARITY_THRESHOLD = 0.3
 
+# Candidates shortlisted by binary-quantized Hamming distance before the
+# exact cosine re-rank in search_relevant_summaries
+BINARY_PREFILTER_CANDIDATES = 200
+
 # Prompt for summarizing chat sessions
 SUMMARIZATION_PROMPT = """You are a conversation summarizer. Analyze the following chat conversation and provide:
 
@@ -161,7 +166,7 @@ class SessionCleanupService:
                 
                 summary_data = json.loads(response_text)
                 summary_text = summary_data.get("summary", response)
-                topics = summary_data.get("topics", [])
+                topics = summary_data.get("topics") or []
                 
             except json.JSONDecodeError:
                 # If JSON parsing fails, use the raw response as summary
@@ -180,7 +185,7 @@ class SessionCleanupService:
                 embedding_text += f" Topics: {', '.join(topics)}"
             
             embedding = await embedding_service.create_embedding(embedding_text)
-            if not embedding:
+            if embedding is None:
                 logger.warning(f"Could not create embedding for session {session.session_id}")
             
             # Create summary record
@@ -346,6 +351,37 @@ class SessionCleanupService:
         result = await db.execute(query)
         return list(result.scalars().all())
     
+    async def get_recent_summary_context_rows(
+        self,
+        db: AsyncSession,
+        limit: int = 5,
+    ) -> List[Row]:
+        """
+        Get the fields needed to render recent summaries as prompt context.
+        
+        The session start time comes back pre-formatted by Postgres
+        (created_fmt, 'YYYY-MM-DD HH24:MI' in UTC) next to summary and topics.
+        
+        Args:
+            db: Database session
+            limit: Maximum number of summaries to return
+            
+        Returns:
+            Rows with summary, topics and created_fmt, newest first
+        """
+        result = await db.execute(
+            select(
+                ChatSummary.summary,
+                ChatSummary.topics,
+                func.to_char(
+                    func.timezone("UTC", ChatSummary.session_created_at), "YYYY-MM-DD HH24:MI"
+                ).label("created_fmt"),
+            )
+            .order_by(ChatSummary.created_at.desc())
+            .limit(limit)
+        )
+        return list(result.all())
+    
     async def get_summaries_by_topic(
         self,
         db: AsyncSession,
@@ -395,50 +431,76 @@ class SessionCleanupService:
         """
         query_embedding = await embedding_service.create_embedding(query_text)
         
-        if not query_embedding:
+        if query_embedding is None:
             logger.warning("Could not create embedding for query, falling back to recent summaries")
             summaries = await self.get_recent_summaries(db, limit=limit)
             return [(s, 0.5) for s in summaries]
         
-        embedding_str = f"[{','.join(str(x) for x in query_embedding)}]"
+        embedding_str = f"[{','.join(map(str, query_embedding.tolist()))}]"
         
+        # Two-stage search: shortlist candidates by Hamming distance over the
+        # binary-quantized embeddings (idx_chat_summaries_embedding_bits), then
+        # re-rank only that shortlist with the exact cosine distance.
         if use_recency_decay:
             sql = text("""
+                WITH candidates AS (
+                    SELECT id FROM chat_summaries
+                    WHERE embedding IS NOT NULL
+                    ORDER BY binary_quantize(embedding)::bit(1536)
+                        <~> binary_quantize(:embedding::halfvec)
+                    LIMIT :candidates
+                )
                 SELECT 
                     id, session_id, user_id, summary, topics, message_count,
                     session_created_at, session_ended_at, created_at, metadata,
                     last_accessed_at, source,
-                    1 - (embedding <=> :embedding::vector) as similarity,
-                    (1 - (embedding <=> :embedding::vector))
+                    1 - (embedding <=> :embedding::halfvec) as similarity,
+                    (1 - (embedding <=> :embedding::halfvec))
                       * EXP(-0.023 * EXTRACT(EPOCH FROM (NOW() - COALESCE(last_accessed_at, session_ended_at))) / 86400.0)
                       AS final_score
                 FROM chat_summaries
-                WHERE embedding IS NOT NULL
-                AND 1 - (embedding <=> :embedding::vector) >= :threshold
+                WHERE id IN (SELECT id FROM candidates)
+                AND 1 - (embedding <=> :embedding::halfvec) >= :threshold
                 ORDER BY final_score DESC
                 LIMIT :limit
             """)
         else:
             sql = text("""
+                WITH candidates AS (
+                    SELECT id FROM chat_summaries
+                    WHERE embedding IS NOT NULL
+                    ORDER BY binary_quantize(embedding)::bit(1536)
+                        <~> binary_quantize(:embedding::halfvec)
+                    LIMIT :candidates
+                )
                 SELECT 
                     id, session_id, user_id, summary, topics, message_count,
                     session_created_at, session_ended_at, created_at, metadata,
                     last_accessed_at, source,
-                    1 - (embedding <=> :embedding::vector) as similarity,
-                    1 - (embedding <=> :embedding::vector) as final_score
+                    1 - (embedding <=> :embedding::halfvec) as similarity,
+                    1 - (embedding <=> :embedding::halfvec) as final_score
                 FROM chat_summaries
-                WHERE embedding IS NOT NULL
-                AND 1 - (embedding <=> :embedding::vector) >= :threshold
-                ORDER BY embedding <=> :embedding::vector
+                WHERE id IN (SELECT id FROM candidates)
+                AND 1 - (embedding <=> :embedding::halfvec) >= :threshold
+                ORDER BY embedding <=> :embedding::halfvec
                 LIMIT :limit
             """)
         
+        # Scope the HNSW search breadth to this transaction (SET LOCAL equivalent).
+        # HNSW returns at most ef_search rows, so it must cover the shortlist.
+        ef_search = max(get_settings().hnsw_ef_search, BINARY_PREFILTER_CANDIDATES)
+        await db.execute(
+            text("SELECT set_config('hnsw.ef_search', :ef, true)"),
+            {"ef": str(ef_search)},
+        )
+
         result = await db.execute(
             sql,
             {
                 "embedding": embedding_str,
                 "threshold": similarity_threshold,
                 "limit": limit,
+                "candidates": BINARY_PREFILTER_CANDIDATES,
             }
         )
         
@@ -1,12 +1,16 @@
 """Session management service."""
 import uuid
 from datetime import datetime, timezone
-from typing import List, Optional
-from sqlalchemy import select, update
+from typing import AsyncIterator, List, Optional, Sequence
+from sqlalchemy import Row, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from models.session import Session
 from models.message import Message
 
+# to_char pattern matching datetime.isoformat() for UTC timestamps
+ISO_UTC_FORMAT = 'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"'
+
 
 class SessionManager:
     """Manages chat sessions and messages."""
@@ -58,7 +62,7 @@ class SessionManager:
         role: str,
         content: str,
         metadata: Optional[dict] = None,
-    ) -> Message:
+    ) -> Row:
         """
         Add a message to a session.
         
@@ -70,25 +74,64 @@ class SessionManager:
             metadata: Optional metadata dict
             
         Returns:
-            Created Message object
+            Row with the new message's id and timestamp
         """
-        session = await self.get_or_create_session(db, session_id)
+        rows = await self.add_messages(db, session_id, [(role, content, metadata)])
+        return rows[0]
+    
+    async def add_messages(
+        self,
+        db: AsyncSession,
+        session_id: str,
+        messages: Sequence[tuple[str, str, Optional[dict]]],
+    ) -> List[Row]:
+        """
+        Add several messages to a session in one INSERT ... RETURNING.
         
-        message = Message(
-            session_id=session.session_id,
-            role=role,
-            content=content,
-            metadata_=metadata or {},
-        )
-        db.add(message)
+        Args:
+            db: Database session
+            session_id: UUID string of the session
+            messages: (role, content, metadata) tuples, in order
+            
+        Returns:
+            Rows with each new message's id and timestamp, in input order
+        """
+        try:
+            session_uuid = uuid.UUID(session_id)
+        except ValueError:
+            # Invalid UUID, create new one
+            session_uuid = uuid.uuid4()
         
-        # Update session last activity
-        session.last_activity = datetime.now(timezone.utc)
+        # Create the session or bump its last activity in one statement
+        now = datetime.now(timezone.utc)
+        await db.execute(
+            pg_insert(Session)
+            .values(session_id=session_uuid, created_at=now, last_activity=now)
+            .on_conflict_do_update(
+                index_elements=[Session.session_id],
+                set_={"last_activity": now},
+            )
+        )
         
+        # A Core insert skips the ORM unit of work; the Python-side timestamp
+        # default still applies and comes back through RETURNING
+        result = await db.execute(
+            insert(Message)
+            .values([
+                {
+                    "session_id": session_uuid,
+                    "role": role,
+                    "content": content,
+                    "metadata_": metadata or {},
+                }
+                for role, content, metadata in messages
+            ])
+            .returning(Message.id, Message.timestamp)
+        )
+        rows = result.all()
         await db.commit()
-        await db.refresh(message)
         
-        return message
+        return rows
     
     async def get_messages(
         self,
@@ -124,6 +167,94 @@ class SessionManager:
         result = await db.execute(query)
         return list(result.scalars().all())
     
+    async def stream_messages(
+        self,
+        db: AsyncSession,
+        session_id: str,
+        limit: Optional[int] = None,
+        batch_size: int = 200,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Stream a session's messages as plain rows, in batches.
+        
+        Uses a server-side cursor and skips ORM hydration, for callers that
+        only serialize the rows. Timestamps are formatted as ISO 8601 strings
+        by Postgres, so rows need no per-row isoformat().
+        
+        Args:
+            db: Database session
+            session_id: UUID string of the session
+            limit: Optional limit on number of messages
+            batch_size: Rows fetched per round-trip
+            
+        Yields:
+            Batches of rows with id, session_id, role, content, timestamp
+            and metadata_ columns
+        """
+        try:
+            session_uuid = uuid.UUID(session_id)
+        except ValueError:
+            return
+        
+        query = (
+            select(
+                Message.id,
+                Message.session_id,
+                Message.role,
+                Message.content,
+                func.to_char(
+                    func.timezone("UTC", Message.timestamp), ISO_UTC_FORMAT
+                ).label("timestamp"),
+                Message.metadata_.label("metadata_"),
+            )
+            .where(Message.session_id == session_uuid)
+            .order_by(Message.timestamp)
+            .execution_options(yield_per=batch_size)
+        )
+        
+        if limit:
+            query = query.limit(limit)
+        
+        result = await db.stream(query)
+        async for partition in result.partitions():
+            yield partition
+    
+    async def get_recent_messages(
+        self,
+        db: AsyncSession,
+        session_id: str,
+        limit: int,
+    ) -> List[Message]:
+        """
+        Get the most recent messages for a session, oldest first.
+        
+        Args:
+            db: Database session
+            session_id: UUID string of the session
+            limit: Maximum number of messages to return
+            
+        Returns:
+            List of Message objects in chronological order
+        """
+        try:
+            session_uuid = uuid.UUID(session_id)
+        except ValueError:
+            return []
+        
+        result = await db.execute(
+            select(Message)
+            .where(Message.session_id == session_uuid)
+            .order_by(Message.timestamp.desc())
+            .limit(limit)
+        )
+        messages = list(result.scalars().all())
+        messages.reverse()
+        return messages
+    
+    async def get_message(self, db: AsyncSession, message_id: int) -> Optional[Message]:
+        """Get a single message by id, or None if it does not exist."""
+        return await db.get(Message, message_id)
+    
     async def session_exists(self, db: AsyncSession, session_id: str) -> bool:
         """Check if a session exists."""
         try:
@@ -132,9 +263,9 @@ class SessionManager:
             return False
         
         result = await db.execute(
-            select(Session.session_id).where(Session.session_id == session_uuid)
+            select(1).select_from(Session).where(Session.session_id == session_uuid).limit(1)
         )
-        return result.scalar_one_or_none() is not None
+        return result.first() is not None
 
     async def get_latest_session(self, db: AsyncSession) -> Optional[Session]:
         """
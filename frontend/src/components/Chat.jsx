@@ -157,6 +157,7 @@ function Chat() {
       
       streamingMessageRef.current = null
       setIsStreaming(false)
+      setIsTyping(false)
     }
 
     wsClient.on('connect', handleConnect)
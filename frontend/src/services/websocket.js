@@ -2,6 +2,10 @@
  * WebSocket client for real-time chat communication.
  */
 
+// Frames travel as binary (UTF-8 encoded JSON) in both directions
+const frameDecoder = new TextDecoder();
+const frameEncoder = new TextEncoder();
+
 class WebSocketClient {
   constructor() {
     this.socket = null;
@@ -55,6 +59,7 @@ class WebSocketClient {
       
       console.log('Connecting to WebSocket:', url);
       this.socket = new WebSocket(url);
+      this.socket.binaryType = 'arraybuffer';
 
       this.socket.onopen = () => {
         console.log('WebSocket connected');
@@ -85,7 +90,8 @@ class WebSocketClient {
 
       this.socket.onmessage = (event) => {
         try {
-          const data = JSON.parse(event.data);
+          const text = typeof event.data === 'string' ? event.data : frameDecoder.decode(event.data);
+          const data = JSON.parse(text);
           this.handleMessage(data);
         } catch (error) {
           console.error('Error parsing message:', error);
@@ -149,10 +155,10 @@ class WebSocketClient {
       return;
     }
 
-    this.socket.send(JSON.stringify({
+    this.socket.send(frameEncoder.encode(JSON.stringify({
       type: 'message',
       content,
-    }));
+    })));
   }
 
   /**
@@ -164,9 +170,9 @@ class WebSocketClient {
       return;
     }
 
-    this.socket.send(JSON.stringify({
+    this.socket.send(frameEncoder.encode(JSON.stringify({
       type: 'get_history',
-    }));
+    })));
   }
 
   /**
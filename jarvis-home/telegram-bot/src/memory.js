@@ -241,7 +241,7 @@ export async function summarizeSession(sessionId, source = 'telegram') {
     `INSERT INTO chat_summaries
        (session_id, summary, topics, embedding, message_count,
         session_created_at, session_ended_at, created_at, source, metadata)
-     VALUES ($1, $2, $3, $4::vector, $5, $6, $7, NOW(), $8, '{}')
+     VALUES ($1, $2, $3, $4::halfvec, $5, $6, $7, NOW(), $8, '{}')
      ON CONFLICT (session_id) DO NOTHING`,
     [
       sessionId, summary, JSON.stringify(topics),
@@ -276,10 +276,10 @@ export async function storeFact(content, category = null, source = 'telegram', c
   if (embedding) {
     const { rows } = await query(
       `SELECT id, content,
-              1 - (embedding <=> $1::vector) AS similarity
+              1 - (embedding <=> $1::halfvec) AS similarity
        FROM memory_facts
        WHERE embedding IS NOT NULL
-       ORDER BY embedding <=> $1::vector
+       ORDER BY embedding <=> $1::halfvec
        LIMIT 1`,
       [vectorLiteral(embedding)]
     );
@@ -290,7 +290,7 @@ export async function storeFact(content, category = null, source = 'telegram', c
 
   await query(
     `INSERT INTO memory_facts (content, category, embedding, source, created_by, created_at, metadata)
-     VALUES ($1, $2, $3::vector, $4, $5, NOW(), '{}')`,
+     VALUES ($1, $2, $3::halfvec, $4, $5, NOW(), '{}')`,
     [content, category, embedding ? vectorLiteral(embedding) : null, source, createdBy]
   );
 
@@ -351,14 +351,14 @@ export async function searchMemory(queryText, limit = 3) {
 
   const { rows } = await query(
     `SELECT id, summary, topics, session_ended_at, source,
-            1 - (embedding <=> $1::vector) AS similarity,
+            1 - (embedding <=> $1::halfvec) AS similarity,
             EXTRACT(EPOCH FROM (NOW() - COALESCE(last_accessed_at, session_ended_at))) / 86400.0 AS age_days,
-            (1 - (embedding <=> $1::vector))
+            (1 - (embedding <=> $1::halfvec))
               * EXP(-${DECAY_LAMBDA} * EXTRACT(EPOCH FROM (NOW() - COALESCE(last_accessed_at, session_ended_at))) / 86400.0)
               AS final_score
      FROM chat_summaries
      WHERE embedding IS NOT NULL
-       AND 1 - (embedding <=> $1::vector) >= $2
+       AND 1 - (embedding <=> $1::halfvec) >= $2
      ORDER BY final_score DESC
      LIMIT $3`,
     [vec, SIMILARITY_THRESHOLD, limit]
@@ -481,7 +481,7 @@ export async function deduplicateFacts(candidateFacts) {
     const { rows } = await query(
       `SELECT 1 FROM memory_facts
        WHERE embedding IS NOT NULL
-         AND 1 - (embedding <=> $1::vector) >= $2
+         AND 1 - (embedding <=> $1::halfvec) >= $2
        LIMIT 1`,
       [vectorLiteral(embedding), FACT_DEDUP_THRESHOLD]
     );